@@ -3,7 +3,6 @@
 # Copyright (c) CERN, 2024.                   #
 # ########################################### #
 
-import os
 import numpy as np
 import pyvista as pv
 import matplotlib.pyplot as plt
@@ -12,7 +11,6 @@ from wakis import SolverFIT3D
 from wakis import GridFIT3D 
 from wakis import WakeSolver
 
-from tqdm import tqdm
 
 # ---------- MPI setup ------------
 from mpi4py import MPI
@@ -37,27 +35,35 @@ stl_materials = {'cavity': 'vacuum',
                  'shell': [30, 1.0, 30] #[eps_r, mu_r, sigma[S/m]]
                  }
 
-# Extract domain bounds from geometry
-solids = pv.read(solid_1) + pv.read(solid_2)
-xmin, xmax, ymin, ymax, zmin, zmax = solids.bounds
+# Extract domain bounds from geometry: the stl 
+# files are only read on rank 0
+bounds = np.empty((len(stl_solids), 6))
+if rank == 0:
+    bounds[:] = [pv.read(solid).bounds for solid in stl_solids.values()]
+comm.Bcast(bounds, root=0)
+xmin, ymin, zmin = bounds[:, 0::2].min(axis=0)
+xmax, ymax, zmax = bounds[:, 1::2].max(axis=0)
 
 # Number of mesh cells
 Nx = 80
 Ny = 80
 Nz = 141
 
-# Adjust for MPI & ompute local Z-slice range
-Nz += Nz%(size-1)
-dz = (zmax - zmin) / Nz
+# Split the z planes among all the ranks
 z = np.linspace(zmin, zmax, Nz+1)
 
-Nz_mpi = Nz // (size-1) 
-zmin_mpi = (rank-1) * Nz_mpi * dz
-zmax_mpi= rank * Nz_mpi * dz
+base, rem = divmod(Nz, size)
+z_offsets = np.cumsum([0] + [base + (1 if r < rem else 0) for r in range(size)])
+
+# z planes [k0, k1) of each rank: the owned planes plus
+# one ghost plane at each interface with another rank
+slabs = [(z_offsets[r] - (r > 0), z_offsets[r+1] + (r < size-1)) for r in range(size)]
+k0, k1 = slabs[rank]
 
-print(f"Process {rank}: Handling Z range {zmin_mpi} to {zmax_mpi}")
+print(f"Process {rank}: Handling Z range {z[z_offsets[rank]]} to {z[z_offsets[rank+1]]}")
 
-# set grid and geometry
+# set grid and geometry: the stl solids are voxelized 
+# once on rank 0 and each rank receives its z-slab 
 if rank == 0:
     grid = GridFIT3D(xmin, xmax, ymin, ymax, zmin, zmax, 
                     Nx, Ny, Nz, 
@@ -67,16 +73,26 @@ if rank == 0:
                     stl_rotate=[0,0,0],
                     stl_translate=[0,0,0],
                     verbose=1)
-else:
-    grid = GridFIT3D(xmin, xmax, ymin, ymax, 
-                        zmin_mpi, zmax_mpi, 
-                        Nx, Ny, Nz_mpi, 
-                        stl_solids=stl_solids, 
-                        stl_materials=stl_materials,
-                        stl_scale=1.0,
-                        stl_rotate=[0,0,0],
-                        stl_translate=[0,0,0],
-                        verbose=1)
+
+counts = [Nx*Ny*(b-a) for a, b in slabs]
+displs = np.cumsum([0] + counts[:-1])
+solids = {}
+for key in stl_solids:
+    sendbuf = None
+    if rank == 0:
+        mask = np.reshape(grid.grid[key], (Nx, Ny, Nz))
+        sendbuf = np.concatenate([mask[:, :, a:b].ravel() for a, b in slabs])
+    solids[key] = np.empty((Nx, Ny, k1-k0), dtype=bool)
+    comm.Scatterv([sendbuf, counts, displs, MPI.BOOL], solids[key], root=0)
+
+grid = GridFIT3D.from_arrays(xmin, xmax, ymin, ymax, 
+                             z[k0], z[k1], 
+                             Nx, Ny, k1-k0, 
+                             solids=solids, 
+                             stl_materials=stl_materials,
+                             stl_solids=stl_solids,
+                             verbose=1)
+
 # BONUS: Visualize grid - Uncomment for plotting!
 # grid.inspect(add_stl=[solid_1, solid_2], stl_opacity=1.0)
 
@@ -112,53 +128,28 @@ wake = WakeSolver(q=q,
 bc_low=['pec', 'pec', 'pec']
 bc_high=['pec', 'pec', 'pec']
 
-# on-the-fly plotting parameters
-if not os.path.exists('001_img/'): 
-    os.mkdir('001_img/')
-
-plotkw2D = {'title':'001_img/Ez', 
-            'add_patch':'cavity', 'patch_alpha':1.0,
-            'patch_reverse' : True,  # patch logical_not('cavity')
-            'vmin':-1e3, 'vmax':1e3, # colormap limits
-            'cmap': 'rainbow',
-            'plane': [int(Nx/2),                       # x
-                      slice(0, Ny),                    # y
-                      slice(add_space, -add_space)]}   # z
-
 # Solver setup
 solver = SolverFIT3D(grid, wake,
                     bc_low=bc_low, 
                     bc_high=bc_high, 
                     use_stl=True, 
-                    bg='pec' # Background material
+                    bg='pec', # Background material
+                    dtype=np.float32, # single precision fields
+                    use_mpi=True, # z-slab decomposition
                     )
-# [TODO]: domain should be split after the tensors are built 
-# to avoid issues with boundary conditions / geometry
-# Maybe need to add >1 ghost cells
+# Note: with 'pml' in z, the first and last slabs must be 
+# at least `n_pml` planes thick to hold the PML layers
 
-# Solver run
-'''
+# Solver run: each rank writes its z-slab of Ez
+# to the Ez_file with parallel HDF5 (if available)
 solver.wakesolve(wakelength=wakelength, 
                  add_space=add_space,
-                 plot=True, # turn False for speedup
-                 plot_every=30, plot_until=3000, **plotkw2D
+                 plot=False, 
                  )
-'''
-from wakis.sources import Beam
-beam = Beam(q=q, sigmaz=sigmaz, beta=beta,
-            xsource=xs, ysource=ys)
-
-Nt = 1/solver.dt * (wake.wakelength + wake.ti*wake.v \
-             + (solver.z.max()-solver.z.min()))/wake.v 
-
-for n in tqdm(range(Nt)):
-
-    beam.update_mpi(solver, n*solver.dt, zmin, z)
-
-    solver.one_step()
-
-    #Communicate slices [TODO]
 
+# wake potential and impedance are computed on rank 0
+if rank != 0:
+    exit()
 
 # ----------- 1d plot results --------------------
 # Plot longitudinal wake potential and impedance
@@ -211,20 +202,3 @@ ax[1].legend()
 fig3.tight_layout()
 fig3.savefig('001_results/001_transverse_y.png')
 #plt.show()
-
-# Plot Electric field component in 2D using imshow
-solver.plot1D(field='E', component='z', 
-              line='z', pos=0.5, xscale='linear', yscale='linear',
-              off_screen=True, title='001_img/Ez1d')
-#plt.show()
-
-# ----------- 2d plots results --------------------
-from matplotlib.colors import LinearSegmentedColormap
-cmap = LinearSegmentedColormap.from_list('name', plt.cm.jet(np.linspace(0.1, 0.9))) # CST's colormap
-
-# Plot Electric field component in 2D using imshow
-solver.plot2D(field='E', component='z', 
-              plane='XY', pos=0.5, 
-              cmap=cmap, vmin=-500, vmax=500., interpolation='hanning',
-              add_patch='cavity', patch_reverse=True, patch_alpha=0.8, 
-              off_screen=True, title='001_img/Ez2d')
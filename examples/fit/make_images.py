@@ -0,0 +1,79 @@
+'''
+Render the field planes saved by `script_noeb_fit.py`
+in `noeb_fields.h5` into PNG images, one per timestep,
+in the folders imgE/ and imgH/. Frames are rendered in
+parallel with multiprocessing
+
+The figure layout (`FieldPlotter`) is shared with the
+debug mode of `script_noeb_fit.py`
+
+Usage: python make_images.py [noeb_fields.h5] [nprocs]
+'''
+
+import os, sys
+import h5py
+import numpy as np
+import matplotlib
+from matplotlib import pyplot as plt
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+from multiprocessing import Pool
+
+limits = {'E': 1.e6, 'H': 5e3}
+
+class FieldPlotter:
+    '''
+    Plots the FIT and FDTD components of field `field` ('E' or 'H')
+    in a 2x3 figure. The figure, images and colorbars are created
+    once and only the image data is updated every timestep
+    '''
+    def __init__(self, field, title, xax, yax, shape):
+        self.field = field
+        self.dims = ['x', 'y', 'z']
+        self.fig, self.axs = plt.subplots(2,3, tight_layout=True, figsize=[8,6])
+        extent = (0, shape[-1], 0, shape[-2])
+        self.ims = []
+        for i, ax in enumerate(self.axs.flat):
+            im = ax.imshow(np.zeros(shape), cmap='rainbow',
+                           vmin=-limits[field], vmax=limits[field], extent=extent)
+            self.fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
+            ax.set_title(f"{'FIT' if i < 3 else 'FDTD'} {field}{self.dims[i%3]}{title}")
+            ax.set_xlabel(xax)
+            ax.set_ylabel(yax)
+            self.ims.append(im)
+
+        os.makedirs(f'img{field}/', exist_ok=True)
+
+    def plot(self, planes, n):
+        '''Plot the planes FIT x, y, z, FDTD x, y, z of timestep `n`'''
+        for i, im in enumerate(self.ims):
+            im.set_data(planes[i])
+
+        self.fig.suptitle(f'{self.field} field, timestep={n}')
+        self.fig.savefig(f'img{self.field}/'+str(n).zfill(4)+'.png')
+
+plotters = {}  # one plotter per field and worker process
+
+def plot_frame(args):
+    filename, field, n = args
+
+    with h5py.File(filename, 'r') as hf:
+        planes = hf[field][n]
+        title, xax, yax = hf.attrs['title'], hf.attrs['xax'], hf.attrs['yax']
+
+    if field not in plotters:
+        plotters[field] = FieldPlotter(field, title, xax, yax, planes.shape[-2:])
+    plotters[field].plot(planes, n)
+
+if __name__ == '__main__':
+
+    matplotlib.use('Agg')
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'noeb_fields.h5'
+    nprocs = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with h5py.File(filename, 'r') as hf:
+        Nt = hf['E'].shape[0]
+
+    frames = [(filename, field, n) for field in ['E', 'H'] for n in range(Nt)]
+
+    with Pool(nprocs) as pool:
+        pool.map(plot_frame, frames)
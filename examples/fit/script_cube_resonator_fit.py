@@ -28,14 +28,14 @@ theta = 0 #np.pi/8
 
 def analytic_sol_Hz(x, y, z, t):
     Rm = np.array([[np.cos(-theta), - np.sin(-theta), 0],[np.sin(-theta), np.cos(-theta), 0], [0, 0, 1]])
-    [x_0, y_0, z_0] = np.dot(Rm, np.array([x, y, z]))
+    [x_0, y_0, z_0] = np.einsum('ij,j...->i...', Rm, np.array([x, y, z]))
 
     return np.cos(m * np.pi / Lx * (x_0 - Lx/2)) * np.cos(n * np.pi / Ly * (y_0 - Ly/2)) * np.sin(
         p * np.pi / Lz * (z_0 - Lz/2)) * np.cos(np.sqrt(2) * np.pi / Lx * c_light * t)
 
 def analytic_sol_Hy(x, y, z, t):
     Rm = np.array([[np.cos(-theta), - np.sin(-theta), 0],[np.sin(-theta), np.cos(-theta), 0], [0, 0, 1]])
-    [x_0, y_0, z_0] = np.dot(Rm, np.array([x, y, z]))
+    [x_0, y_0, z_0] = np.einsum('ij,j...->i...', Rm, np.array([x, y, z]))
     h_2 = (m * np.pi / Lx) ** 2 + (n * np.pi / Ly) ** 2 + (p * np.pi / Lz) ** 2
 
     return -2 / h_2 * (n * np.pi / Ly) * (p * np.pi / Lz) * np.cos(m * np.pi / Lx * (x_0 - Lx/2)) * np.sin(
@@ -44,7 +44,7 @@ def analytic_sol_Hy(x, y, z, t):
 
 def analytic_sol_Hx(x, y, z, t):
     Rm = np.array([[np.cos(-theta), - np.sin(-theta), 0],[np.sin(-theta), np.cos(-theta), 0], [0, 0, 1]])
-    [x_0, y_0, z_0] = np.dot(Rm, np.array([x, y, z]))
+    [x_0, y_0, z_0] = np.einsum('ij,j...->i...', Rm, np.array([x, y, z]))
     h_2 = (m * np.pi / Lx) ** 2 + (n * np.pi / Ly) ** 2 + (p * np.pi / Lz) ** 2
 
     return -2 / h_2 * (m * np.pi / Lx) * (p * np.pi / Lz) * np.sin(m * np.pi / Lx * (x_0 - Lx/2)) * np.cos(
@@ -196,42 +196,25 @@ def plot_H_field(solverFIT, solverFDTD, n):
 
 
 #---- Initial conditions -----#
-for ii in range(Nx):
-    for jj in range(Ny):
-        for kk in range(Nz):
-
-            if gridFDTD.flag_int_cell_xy[ii, jj, kk]:
-                x = (ii) * dx + xmin
-                y = (jj) * dy + ymin
-                z = kk * dz + zmin
-                solverFDTD.Hz[ii, jj, kk] = analytic_sol_Hz(x, y, z, -0.5 * solverFDTD.dt)
-
-            x = ii * dx + xmin
-            y = jj * dy + ymin
-            z = kk * dz + zmin
-            solverFIT.H[ii, jj, kk, 'z'] = analytic_sol_Hz(x, y, z, -0.5 * solverFDTD.dt)
-
-            if gridFDTD.flag_int_cell_zx[ii, jj, kk]:
-                x = (ii) * dx + xmin
-                y = jj * dy + ymin
-                z = (kk) * dz + zmin
-                solverFDTD.Hy[ii, jj, kk] = analytic_sol_Hy(x, y, z, -0.5 * solverFDTD.dt)
-
-            x = ii * dx + xmin
-            y = jj * dy + ymin
-            z = kk * dz + zmin
-            solverFIT.H[ii, jj, kk, 'y'] = analytic_sol_Hy(x, y, z, -0.5 * solverFIT.dt)
-
-            if gridFDTD.flag_int_cell_yz[ii, jj, kk]:
-                x = ii*dx + xmin
-                y = (jj)*dy + ymin
-                z = (kk)*dz + zmin
-                solverFDTD.Hx[ii, jj, kk] = analytic_sol_Hx(x, y, z, -0.5 * solverFDTD.dt)
-
-            x = ii * dx + xmin
-            y = jj * dy + ymin
-            z = kk * dz + zmin
-            solverFIT.H[ii, jj, kk, 'x'] = analytic_sol_Hx(x, y, z, -0.5 * solverFIT.dt)
+# cell coordinates, evaluated once for the whole domain
+X, Y, Z = np.meshgrid(np.arange(Nx)*dx + xmin, 
+                      np.arange(Ny)*dy + ymin, 
+                      np.arange(Nz)*dz + zmin, indexing='ij')
+
+Hz = analytic_sol_Hz(X, Y, Z, -0.5 * solverFDTD.dt)
+mask = gridFDTD.flag_int_cell_xy[:, :, :Nz]
+solverFDTD.Hz[:, :, :Nz][mask] = Hz[mask]
+solverFIT.H[:, :, :, 'z'] = Hz
+
+Hy = analytic_sol_Hy(X, Y, Z, -0.5 * solverFDTD.dt)
+mask = gridFDTD.flag_int_cell_zx[:, :Ny, :]
+solverFDTD.Hy[:, :Ny, :][mask] = Hy[mask]
+solverFIT.H[:, :, :, 'y'] = analytic_sol_Hy(X, Y, Z, -0.5 * solverFIT.dt)
+
+Hx = analytic_sol_Hx(X, Y, Z, -0.5 * solverFDTD.dt)
+mask = gridFDTD.flag_int_cell_yz[:Nx, :, :]
+solverFDTD.Hx[:Nx, :, :][mask] = Hx[mask]
+solverFIT.H[:, :, :, 'x'] = analytic_sol_Hx(X, Y, Z, -0.5 * solverFIT.dt)
 
 #----- Time loop -----#
 
@@ -249,24 +232,9 @@ for nt in tqdm(range(Nt)):
 
 analytic = EMSolver3D(gridFDTD, 'FDTD', NCFL)
 
-for ii in range(Nx):
-    for jj in range(Ny):
-        for kk in range(Nz):
-
-            x = (ii) * dx + xmin
-            y = (jj) * dy + ymin
-            z = kk * dz + zmin
-            analytic.Hz[ii, jj, kk] = analytic_sol_Hz(x, y, z, (Nt-0.5) * analytic.dt)
-
-            x = (ii) * dx + xmin
-            y = jj * dy + ymin
-            z = (kk) * dz + zmin
-            analytic.Hy[ii, jj, kk] = analytic_sol_Hy(x, y, z, (Nt-0.5) * analytic.dt)
-
-            x = ii*dx + xmin
-            y = (jj)*dy + ymin
-            z = (kk)*dz + zmin
-            analytic.Hx[ii, jj, kk] = analytic_sol_Hx(x, y, z, (Nt-0.5) * analytic.dt)
+analytic.Hz[:Nx, :Ny, :Nz] = analytic_sol_Hz(X, Y, Z, (Nt-0.5) * analytic.dt)
+analytic.Hy[:Nx, :Ny, :Nz] = analytic_sol_Hy(X, Y, Z, (Nt-0.5) * analytic.dt)
+analytic.Hx[:Nx, :Ny, :Nz] = analytic_sol_Hx(X, Y, Z, (Nt-0.5) * analytic.dt)
 
 # Plot fields
 fig, axs = plt.subplots(3,3, tight_layout=True, figsize=[8,6])
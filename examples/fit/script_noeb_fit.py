@@ -5,8 +5,8 @@ import matplotlib
 from matplotlib import pyplot as plt
 from matplotlib import patches
 import os, sys
+import h5py
 from tqdm import tqdm
-from mpl_toolkits.axes_grid1 import make_axes_locatable
 
 sys.path.append('../')
 
@@ -63,6 +63,7 @@ solverFDTD.Ez[xs, ys, zs] = 1.0*c_light
 
 Nt = 150
 plane = 'XY'
+debug = False  # plot every timestep (slow)
 
 if plane == 'XY':
     x, y, z = slice(0,Nx), slice(0,Ny), int(Nz//2) #plane XY
@@ -74,105 +75,35 @@ if plane == 'YZ':
     title = '(Nx/2,y,z)'
     xax, yax = 'z', 'y'
 
-def plot_E_field(solverFIT, solverFDTD, n):
-
-    fig, axs = plt.subplots(2,3, tight_layout=True, figsize=[8,6])
-    dims = {0:'x', 1:'y', 2:'z'}
-    vmin, vmax = -1.e6, 1.e6
-    #FIT
-    extent = (0, N, 0, N)
-    for i, ax in enumerate(axs[0,:]):
-        #vmin, vmax = -np.max(np.abs(solverFIT.E[x, y, z, dims[i]])), np.max(np.abs(solverFIT.E[x, y, z, dims[i]]))
-        im = ax.imshow(solverFIT.E[x, y, z, dims[i]], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-        fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-        ax.set_title(f'FIT E{dims[i]}{title}')
-        ax.set_xlabel(xax)
-        ax.set_ylabel(yax)
-
-    #FDTD
-    ax = axs[1,0]
-    extent = (0, N, 0, N)
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Ex[x, y, z])), np.max(np.abs(solverFDTD.Ex[x, y, z]))
-    im = ax.imshow(solverFDTD.Ex[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Ex{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-    ax = axs[1,1]
-    extent = (0, N, 0, N)
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Ey[x, y, z])), np.max(np.abs(solverFDTD.Ey[x, y, z]))
-    im = ax.imshow(solverFDTD.Ey[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Ey{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-    ax = axs[1,2]
-    extent = (0, N, 0, N)
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Ez[x, y, z])), np.max(np.abs(solverFDTD.Ez[x, y, z]))
-    im = ax.imshow(solverFDTD.Ez[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Ez{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-
-    fig.suptitle(f'E field, timestep={n}')
-    fig.savefig('imgE/'+str(n).zfill(4)+'.png')
-    plt.clf()
-    plt.close(fig)
-
-def plot_H_field(solverFIT, solverFDTD, n):
-
-    fig, axs = plt.subplots(2,3, tight_layout=True, figsize=[8,6])
-    dims = {0:'x', 1:'y', 2:'z'}
-    extent = (0, N, 0, N)
-    vmin, vmax = -5e3, 5e3
-    #FIT
-    for i, ax in enumerate(axs[0,:]):
-        #vmin, vmax = -np.max(np.abs(solverFIT.H[x, y, z, dims[i]])), np.max(np.abs(solverFIT.H[x, y, z, dims[i]]))
-        im = ax.imshow(solverFIT.H[x, y, z, dims[i]], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-        fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-        ax.set_title(f'FIT H{dims[i]}{title}')
-        ax.set_xlabel(xax)
-        ax.set_ylabel(yax)
-
-    #FDTD
-    ax = axs[1,0]
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Hx[x, y, z])), np.max(np.abs(solverFDTD.Hx[x, y, z]))
-    im = ax.imshow(solverFDTD.Hx[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Hx{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-    ax = axs[1,1]
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Hy[x, y, z])), np.max(np.abs(solverFDTD.Hy[x, y, z]))
-    im = ax.imshow(solverFDTD.Hy[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Hy{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-    ax = axs[1,2]
-    #vmin, vmax = -np.max(np.abs(solverFDTD.Hz[x, y, z])), np.max(np.abs(solverFDTD.Hz[x, y, z]))
-    im = ax.imshow(solverFDTD.Hz[x, y, z], cmap='rainbow', vmin=vmin, vmax=vmax, extent=extent)
-    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-    ax.set_title(f'FDTD Hz{title}')
-    ax.set_xlabel(xax)
-    ax.set_ylabel(yax)
-
-    fig.suptitle(f'H field, timestep={n}')
-    fig.savefig('imgH/'+str(n).zfill(4)+'.png')
-    plt.clf()
-    plt.close(fig)
+# same figure layout as the offline rendering
+if debug:
+    from make_images import FieldPlotter
+    plotE = FieldPlotter('E', title, xax, yax, (N, N))
+    plotH = FieldPlotter('H', title, xax, yax, (N, N))
+
+# buffer the field planes: FIT x, y, z, FDTD x, y, z
+# and save them once after the loop. Images are 
+# rendered offline with `make_images.py`
+E_planes = np.empty((Nt, 6, N, N), dtype=np.float32)
+H_planes = np.empty((Nt, 6, N, N), dtype=np.float32)
 
 for n in tqdm(range(Nt)):
 
     solverFIT.one_step()
     solverFDTD.one_step()
 
-    plot_E_field(solverFIT, solverFDTD, n)
-    plot_H_field(solverFIT, solverFDTD, n)
+    for i, d in enumerate(['x', 'y', 'z']):
+        E_planes[n, i] = solverFIT.E[x, y, z, d]
+        H_planes[n, i] = solverFIT.H[x, y, z, d]
+    E_planes[n, 3:] = solverFDTD.Ex[x, y, z], solverFDTD.Ey[x, y, z], solverFDTD.Ez[x, y, z]
+    H_planes[n, 3:] = solverFDTD.Hx[x, y, z], solverFDTD.Hy[x, y, z], solverFDTD.Hz[x, y, z]
+
+    if debug:
+        plotE.plot(E_planes[n], n)
+        plotH.plot(H_planes[n], n)
+
+with h5py.File('noeb_fields.h5', 'w') as hf:
+    hf.create_dataset('E', data=E_planes, compression='lzf')
+    hf.create_dataset('H', data=H_planes, compression='lzf')
+    hf.attrs['title'], hf.attrs['xax'], hf.attrs['yax'] = title, xax, yax
 
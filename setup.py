@@ -54,6 +54,8 @@ setup(
         ],
     extras_require={
         'gpu': ['cupy'],
+        'numba': ['numba'],
+        'mpi': ['mpi4py'],
         'notebook': notebook_required,
         },
     tests_require=['pytest'],
@@ -0,0 +1,121 @@
+import sys
+import pytest
+import numpy as np
+
+sys.path.append('../wakis')
+from wakis import SolverFIT3D
+from wakis import GridFIT3D
+from wakis import kernels
+from wakis import cuda_kernels
+
+pytest.importorskip('numba')
+
+class TestStencilKernels:
+    '''Compare the compiled stencil kernels against
+    the sparse matrix-vector time update'''
+
+    Nx, Ny, Nz = 10, 12, 14
+    Nt = 50
+
+    def run(self, use_numba, bc_low, bc_high, bg=[1.0, 1.0], dtype=np.float64, use_morton=False):
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        solver = SolverFIT3D(grid, bc_low=bc_low, bc_high=bc_high, bg=bg,
+                             use_numba=use_numba, dtype=dtype, use_morton=use_morton, 
+                             verbose=0)
+
+        rng = np.random.default_rng(42)
+        solver.E.fromarray(rng.standard_normal(3*solver.N).astype(dtype))
+        solver.H.fromarray((rng.standard_normal(3*solver.N)*1e-3).astype(dtype))
+        solver.J[self.Nx//2, self.Ny//2, :, 'z'] = 1e-6
+
+        for n in range(self.Nt):
+            solver.one_step()
+
+        return solver
+
+    @pytest.mark.parametrize('bc_low, bc_high, bg', [
+        (['pec', 'pec', 'pec'], ['pec', 'pec', 'pec'], [1.0, 1.0]),
+        (['periodic', 'periodic', 'pec'], ['periodic', 'periodic', 'pml'], [1.0, 1.0]),
+        (['pmc', 'pec', 'abc'], ['pec', 'pmc', 'abc'], [2.0, 1.0]),
+        (['pec', 'pec', 'pec'], ['pec', 'pec', 'pec'], [1.0, 1.0, 10.]),
+    ])
+    def test_kernels_match_sparse(self, bc_low, bc_high, bg):
+        sparse = self.run(False, bc_low, bc_high, bg)
+        stencil = self.run(True, bc_low, bc_high, bg)
+
+        for f in ['E', 'H', 'J']:
+            ref = getattr(sparse, f).toarray()
+            assert np.allclose(getattr(stencil, f).toarray(), ref,
+                               rtol=1e-7, atol=1e-9*np.abs(ref).max()), f'{f} field mismatch'
+
+    @pytest.mark.parametrize('use_numba', [False, True])
+    def test_single_precision(self, use_numba):
+        bc = ['pec', 'pec', 'pec']
+        ref = self.run(False, bc, bc)
+        single = self.run(use_numba, bc, bc, dtype=np.float32)
+
+        for f in ['E', 'H']:
+            field = getattr(single, f).toarray()
+            assert field.dtype == np.float32, f'{f} field is not float32'
+            assert np.allclose(field, getattr(ref, f).toarray(), 
+                               rtol=1e-3, atol=1e-4*np.abs(field).max()), f'{f} field mismatch'
+
+    @pytest.mark.parametrize('bc_low, bc_high, bg', [
+        (['pec', 'pec', 'pec'], ['pec', 'pec', 'pec'], [1.0, 1.0]),
+        (['pmc', 'pec', 'abc'], ['pec', 'pmc', 'abc'], [2.0, 1.0, 10.]),
+    ])
+    def test_morton_order_matches_sparse(self, bc_low, bc_high, bg):
+        sparse = self.run(False, bc_low, bc_high, bg)
+        morton = self.run(True, bc_low, bc_high, bg, use_morton=True)
+
+        for f in ['E', 'H', 'J']:
+            ref = getattr(sparse, f).toarray()
+            assert np.allclose(getattr(morton, f).toarray(), ref,
+                               rtol=1e-7, atol=1e-9*np.abs(ref).max()), f'{f} field mismatch'
+
+    def test_morton_order_lut(self):
+        k0, k1 = 3, 9
+        order = kernels.morton_order(self.Nx, self.Ny, k0, k1)
+        Nxy = self.Nx*self.Ny
+
+        # every cell of the planes [k0, k1) is visited once
+        assert np.array_equal(np.sort(order), np.arange(k0*Nxy, k1*Nxy))
+
+        # the first 2x2x2 block of the Z-order curve
+        i, j, k = order[:8] % self.Nx, (order[:8]//self.Nx) % self.Ny, order[:8]//Nxy - k0
+        assert np.array_equal(i, [0, 1, 0, 1, 0, 1, 0, 1])
+        assert np.array_equal(j, [0, 0, 1, 1, 0, 0, 1, 1])
+        assert np.array_equal(k, [0, 0, 0, 0, 1, 1, 1, 1])
+
+    @pytest.mark.parametrize('use_cuda', [True, False])
+    def test_gpu_matches_sparse(self, use_cuda):
+        cp = pytest.importorskip('cupy')
+        bc_low, bc_high, bg = ['pmc', 'pec', 'abc'], ['pec', 'pmc', 'abc'], [2.0, 1.0, 10.]
+        sparse = self.run(False, bc_low, bc_high, bg)
+
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        solver = SolverFIT3D(grid, bc_low=bc_low, bc_high=bc_high, bg=bg,
+                             use_gpu=True, use_cuda=use_cuda, verbose=0)
+        assert solver.use_cuda == use_cuda
+
+        rng = np.random.default_rng(42)
+        solver.E.fromarray(cp.asarray(rng.standard_normal(3*solver.N)))
+        solver.H.fromarray(cp.asarray(rng.standard_normal(3*solver.N)*1e-3))
+        solver.J[self.Nx//2, self.Ny//2, :, 'z'] = 1e-6
+
+        for n in range(self.Nt):
+            solver.one_step()
+
+        for f in ['E', 'H', 'J']:
+            ref = getattr(sparse, f).toarray()
+            assert np.allclose(getattr(solver, f).toarray().get(), ref,
+                               rtol=1e-7, atol=1e-9*np.abs(ref).max()), f'{f} field mismatch'
+
+    def test_cuda_kernels_reject_mixed_dtypes(self):
+        N = self.Nx*self.Ny*self.Nz
+        H, E = np.zeros(3*N, dtype=np.float32), np.zeros(3*N, dtype=np.float64)
+        a = m = np.ones(3*N, dtype=np.float32)
+        with pytest.raises(TypeError):
+            cuda_kernels.update_H(H, E, a, m, self.Nx, self.Ny, self.Nz, 0, self.Nz)
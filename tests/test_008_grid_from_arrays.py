@@ -0,0 +1,38 @@
+import sys
+import numpy as np
+
+sys.path.append('../wakis')
+from wakis import SolverFIT3D
+from wakis import GridFIT3D
+
+class TestGridFromArrays:
+    '''Build a z-slab of a voxelized grid from its cell 
+    masks, as done when sharing the geometry among MPI ranks'''
+
+    Nx, Ny, Nz = 20, 20, 30
+    stl_solids = {'Cavity': 'tests/stl/001_cubic_cavity.stl'}
+    stl_materials = {'Cavity': 'vacuum'}
+
+    def test_slab_matches_stl_import(self):
+        grid = GridFIT3D(-0.55, 0.55, -0.55, 0.55, -0.55, 0.55, 
+                         self.Nx, self.Ny, self.Nz, 
+                         stl_solids=self.stl_solids, 
+                         stl_materials=self.stl_materials, verbose=0)
+        solver = SolverFIT3D(grid, use_stl=True, bg='pec', verbose=0)
+
+        # slab of z planes [a, b)
+        a, b = 8, 17
+        Nxy = self.Nx*self.Ny
+        mask = np.reshape(grid.grid['Cavity'], (self.Nx, self.Ny, self.Nz))
+        solids = {'Cavity': mask[:, :, a:b]}
+        slab = GridFIT3D.from_arrays(grid.xmin, grid.xmax, grid.ymin, grid.ymax,
+                                     grid.z[a], grid.z[b], self.Nx, self.Ny, b-a,
+                                     solids=solids, stl_materials=self.stl_materials,
+                                     verbose=0)
+        slab_solver = SolverFIT3D(slab, use_stl=True, bg='pec', verbose=0)
+
+        assert slab.stl_colors == grid.stl_colors
+        assert np.any(solids['Cavity']) and not np.all(solids['Cavity'])
+        for f in ['ieps', 'imu']:
+            ref = getattr(solver, f).toarray().reshape(3, -1)[:, a*Nxy:b*Nxy]
+            assert np.array_equal(getattr(slab_solver, f).toarray().reshape(3, -1), ref), f'{f} mismatch'
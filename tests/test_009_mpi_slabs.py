@@ -0,0 +1,247 @@
+import os
+import sys
+import h5py
+import queue
+import threading
+import pytest
+import numpy as np
+
+sys.path.append('../wakis')
+from wakis import SolverFIT3D
+from wakis import GridFIT3D
+from wakis import WakeSolver
+from wakis import solverFIT3D
+
+pytest.importorskip('numba')
+
+class ThreadComm:
+    '''Stand-in for the mpi4py communicator used by `SolverFIT3D`,
+    where the ranks are python threads. Only one rank runs at a
+    time: the shared lock is released while a rank waits for a
+    message, so the compiled kernels never run concurrently'''
+
+    def __init__(self, world, rank):
+        self.world, self.rank = world, rank
+
+    def Get_rank(self):
+        return self.rank
+
+    def Get_size(self):
+        return self.world['size']
+
+    def _wait(self, func):
+        self.world['lock'].release()
+        try:
+            return func()
+        finally:
+            self.world['lock'].acquire()
+
+    def _box(self, source, dest, tag):
+        with self.world['boxes_lock']:
+            return self.world['boxes'].setdefault((source, dest, tag), queue.Queue())
+
+    def Isend(self, buf, dest, tag):
+        self._box(self.rank, dest, tag).put(np.array(buf, copy=True))
+        return Request(None)
+
+    def Irecv(self, buf, source, tag):
+        box = self._box(source, self.rank, tag)
+        def recv():
+            buf[...] = self._wait(lambda: box.get(timeout=60))
+        return Request(recv)
+
+    def Barrier(self):
+        self._wait(self.world['barrier'].wait)
+
+    def _collect(self, buf):
+        '''Return the copies of `buf` of all the ranks'''
+        slots = self.world['slots']
+        slots[self.rank] = np.array(buf, copy=True)
+        self.Barrier()
+        bufs = list(slots)
+        self.Barrier()
+        return bufs
+
+    def Allreduce(self, sendbuf, recvbuf, op):
+        recvbuf[...] = op.reduce(self._collect(recvbuf))
+
+    def Allgather(self, sendbuf, recvbuf):
+        recvbuf[...] = np.concatenate(self._collect(sendbuf))
+
+    def Allgatherv(self, sendbuf, recvbuf):
+        recvbuf[0][...] = np.concatenate(self._collect(sendbuf))
+
+    def Gather(self, sendbuf, recvbuf, root=0):
+        bufs = self._collect(sendbuf)
+        if self.rank == root:
+            recvbuf[...] = np.concatenate(bufs)
+
+    def Gatherv(self, sendbuf, recvbuf, root=0):
+        bufs = self._collect(sendbuf)
+        if self.rank == root:
+            recvbuf[0][...] = np.concatenate([b.ravel() for b in bufs])
+
+class Request:
+    def __init__(self, func):
+        self.func = func
+
+    def Wait(self):
+        if self.func is not None:
+            self.func()
+
+    @staticmethod
+    def Waitall(reqs):
+        for req in reqs:
+            req.Wait()
+
+class FakeMPI:
+    '''Replaces the `MPI` module in `solverFIT3D`. COMM_WORLD
+    resolves to the communicator of the calling thread'''
+    IN_PLACE = None
+    MIN = np.minimum
+    Request = Request
+    _local = threading.local()
+
+    class _World:
+        def __getattr__(self, name):
+            return getattr(FakeMPI._local.comm, name)
+
+    COMM_WORLD = _World()
+
+class TestMPISlabs:
+    '''Compare the z-slab decomposition, run on threads
+    standing in for the MPI ranks, against the single domain'''
+
+    Nx, Ny, Nz = 8, 10, 24
+    Nt = 40
+    bounds = [(0, 7), (7, 16), (16, 24)]   # owned z planes, uneven slabs
+
+    def initial_fields(self):
+        rng = np.random.default_rng(1)
+        E0 = rng.standard_normal((self.Nx, self.Ny, self.Nz, 3))
+        H0 = rng.standard_normal((self.Nx, self.Ny, self.Nz, 3))*1e-3
+        return E0, H0
+
+    def run(self, grid, k0, k1, **kwargs):
+        solver = SolverFIT3D(grid, verbose=0, **kwargs)
+        E0, H0 = self.initial_fields()
+        for i, d in enumerate(['x', 'y', 'z']):
+            solver.E[:, :, :, d] = E0[:, :, k0:k1, i]
+            solver.H[:, :, :, d] = H0[:, :, k0:k1, i]
+
+        for n in range(self.Nt):
+            solver.one_step()
+
+        return solver
+
+    def run_slabs(self, monkeypatch, task):
+        '''Run `task(grid, k0, k1)` on every rank, where `grid` holds
+        the planes [k0, k1) of the domain: the slab plus ghost planes'''
+        monkeypatch.setattr(solverFIT3D, 'MPI', FakeMPI, raising=False)
+        monkeypatch.setattr(solverFIT3D, 'imported_mpi', True)
+
+        size = len(self.bounds)
+        world = {'size': size, 'lock': threading.Lock(), 'boxes': {},
+                 'boxes_lock': threading.Lock(), 'slots': [None]*size,
+                 'barrier': threading.Barrier(size, timeout=60)}
+        z = np.linspace(-0.7, 0.7, self.Nz+1)
+        results, errors = {}, []
+
+        def rank_work(rank):
+            # slab plus one ghost plane at every interface
+            o0, o1 = self.bounds[rank]
+            k0, k1 = o0 - (rank > 0), o1 + (rank < size-1)
+            world['lock'].acquire()
+            try:
+                FakeMPI._local.comm = ThreadComm(world, rank)
+                grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, z[k0], z[k1],
+                                 self.Nx, self.Ny, k1-k0, verbose=0)
+                results[rank] = (task(grid, k0, k1), o0-k0, o1-k0)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                world['lock'].release()
+
+        threads = [threading.Thread(target=rank_work, args=(r,)) for r in range(size)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        if errors:
+            raise errors[0]
+
+        return results
+
+    @pytest.mark.parametrize('bc_low, bc_high, bg', [
+        (['pec', 'pec', 'pec'], ['pec', 'pec', 'pec'], [1.0, 1.0]),
+        (['pmc', 'pec', 'abc'], ['pec', 'pmc', 'abc'], [2.0, 1.0, 5.]),
+    ])
+    def test_slabs_match_single_domain(self, monkeypatch, bc_low, bc_high, bg):
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        ref = self.run(grid, 0, self.Nz, bc_low=bc_low, bc_high=bc_high, bg=bg)
+        slabs = self.run_slabs(monkeypatch, lambda grid, k0, k1: self.run(grid, k0, k1, use_mpi=True, 
+                               bc_low=bc_low, bc_high=bc_high, bg=bg))
+
+        for rank, (solver, l0, l1) in slabs.items():
+            o0, o1 = self.bounds[rank]
+            assert solver.dt == ref.dt, 'timestep differs between slabs'
+            for f in ['E', 'H', 'J']:
+                for d in ['x', 'y', 'z']:
+                    field = getattr(ref, f)[:, :, o0:o1, d]
+                    scale = max(np.abs(getattr(ref, f).toarray()).max(), 1e-30)
+                    assert np.allclose(getattr(solver, f)[:, :, l0:l1, d], field,
+                                       rtol=1e-10, atol=1e-12*scale), f'{f}{d} mismatch in rank {rank}'
+
+    def wakesolve(self, grid, Ez_file, add_space, **kwargs):
+        wake = WakeSolver(q=1e-9, sigmaz=0.1, xsource=0., ysource=0., xtest=0., ytest=0.,
+                          save=False, logfile=False, Ez_file=Ez_file)
+        bc = ['pec', 'pec', 'pec']
+        solver = SolverFIT3D(grid, wake, bc_low=bc, bc_high=bc, verbose=0, **kwargs)
+        solver.wakesolve(wakelength=0.2, add_space=add_space)
+        return solver
+
+    @pytest.mark.parametrize('add_space', [3, 8])
+    def test_wakesolve_matches_single_domain(self, monkeypatch, tmp_path, add_space):
+        if h5py.get_config().mpi:
+            pytest.skip('the stand-in communicator cannot drive the mpio driver of h5py')
+
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        ref_file, slabs_file = os.path.join(tmp_path, 'Ez.h5'), os.path.join(tmp_path, 'Ez_slabs.h5')
+        self.wakesolve(grid, ref_file, add_space)
+        self.run_slabs(monkeypatch, lambda grid, k0, k1: self.wakesolve(grid, slabs_file, 
+                       add_space, use_mpi=True))
+
+        with h5py.File(ref_file, 'r') as ref, h5py.File(slabs_file, 'r') as slabs:
+            assert sorted(ref.keys()) == sorted(slabs.keys()), 'datasets differ'
+            scale = max(np.abs(ref[key][()]).max() for key in ref.keys() if key.startswith('#'))
+            for key in ref.keys():
+                assert ref[key].shape == slabs[key].shape, f'{key} shape mismatch'
+                assert np.allclose(slabs[key][()], ref[key][()], 
+                                   rtol=1e-10, atol=1e-12*scale), f'{key} mismatch'
+
+    def test_single_rank(self):
+        pytest.importorskip('mpi4py')
+        bc = ['pec', 'pec', 'pec']
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        ref = self.run(grid, 0, self.Nz, bc_low=bc, bc_high=bc)
+        solver = self.run(grid, 0, self.Nz, bc_low=bc, bc_high=bc, use_mpi=True)
+        assert solver.size == 1
+
+        for f in ['E', 'H']:
+            assert np.allclose(getattr(solver, f).toarray(), getattr(ref, f).toarray(),
+                               rtol=1e-12, atol=1e-14), f'{f} field mismatch'
+
+    def test_invalid_options(self, monkeypatch):
+        grid = GridFIT3D(-0.5, 0.5, -0.6, 0.6, -0.7, 0.7,
+                         self.Nx, self.Ny, self.Nz, verbose=0)
+        monkeypatch.setattr(solverFIT3D, 'imported_mpi', True)
+
+        with pytest.raises(ValueError):
+            SolverFIT3D(grid, use_mpi=True, use_gpu=True, verbose=0)
+        with pytest.raises(ValueError):
+            SolverFIT3D(grid, use_mpi=True, use_numba=False, verbose=0)
+
+        monkeypatch.setattr(solverFIT3D, 'imported_mpi', False)
+        with pytest.raises(ImportError):
+            SolverFIT3D(grid, use_mpi=True, verbose=0)
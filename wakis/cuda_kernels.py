@@ -0,0 +1,209 @@
+# copyright ################################# #
+# This file is part of the wakis Package.     #
+# Copyright (c) CERN, 2024.                   #
+# ########################################### #
+
+'''
+The `cuda_kernels.py` script contains the CUDA stencil
+kernels used by `SolverFIT3D` to advance the fields one
+timestep on the GPU. They are the device counterpart of
+the Numba kernels in `kernels.py` and perform the same
+arithmetic, so both give the same result as the sparse
+matrix-vector products of the curl operator.
+
+The kernels operate on the whole flat field arrays of a
+`Field` object (e.g. `E.toarray()`), holding the x, y and z
+components one after the other, with the linear index
+    n = i + j*Nx + k*Nx*Ny
+inside each component. Neighbours falling outside the
+component are taken as zero, reproducing the truncated
+difference matrices Px, Py, Pz of the FIT curl matrix C.
+
+One thread updates one cell. The threads are launched in
+(BLOCK) blocks over the (i, j, k) cells, with i as the
+fastest index so the memory accesses of a warp coalesce.
+
+The kernels are compiled with NVRTC the first time they
+are called for a given dtype, and cached by cupy.
+'''
+
+import numpy as np
+
+try:
+    import cupy as cp
+    imported_cupy = True
+except ImportError:
+    imported_cupy = False
+
+# threads per block in x, y, z
+BLOCK = (32, 4, 4)
+
+_source = r'''
+extern "C" __global__
+void update_H(real* __restrict__ H, const real* __restrict__ E,
+              const real* __restrict__ a, const real* __restrict__ m,
+              const int Nx, const int Ny, const int Nz, const int k0, const int k1)
+{
+    const int i = blockIdx.x*blockDim.x + threadIdx.x;
+    const int j = blockIdx.y*blockDim.y + threadIdx.y;
+    const int k = k0 + blockIdx.z*blockDim.z + threadIdx.z;
+    if (i >= Nx || j >= Ny || k >= k1) return;
+
+    const long long Nxy = (long long)Nx*Ny;
+    const long long N = Nxy*Nz;
+    const long long n = i + Nx*j + Nxy*k;
+    const long long x = n, y = N + n, z = 2*N + n;
+
+    const real ex = m[x]*E[x];
+    const real ey = m[y]*E[y];
+    const real ez = m[z]*E[z];
+
+    // forward neighbours
+    real ex_y = 0, ex_z = 0, ey_x = 0, ey_z = 0, ez_x = 0, ez_y = 0;
+    if (n+1 < N) {
+        ey_x = m[y+1]*E[y+1];
+        ez_x = m[z+1]*E[z+1];
+    }
+    if (n+Nx < N) {
+        ex_y = m[x+Nx]*E[x+Nx];
+        ez_y = m[z+Nx]*E[z+Nx];
+    }
+    if (n+Nxy < N) {
+        ex_z = m[x+Nxy]*E[x+Nxy];
+        ey_z = m[y+Nxy]*E[y+Nxy];
+    }
+
+    H[x] -= a[x]*((ez_y - ez) - (ey_z - ey));
+    H[y] -= a[y]*((ex_z - ex) - (ez_x - ez));
+    H[z] -= a[z]*((ey_x - ey) - (ex_y - ex));
+}
+
+extern "C" __global__
+void update_E(real* __restrict__ E, const real* __restrict__ H, real* __restrict__ J,
+              const real* __restrict__ b, const real* __restrict__ m,
+              const real* __restrict__ c, const real* __restrict__ s,
+              const bool conductive, const int Nx, const int Ny, const int Nz,
+              const int k0, const int k1)
+{
+    const int i = blockIdx.x*blockDim.x + threadIdx.x;
+    const int j = blockIdx.y*blockDim.y + threadIdx.y;
+    const int k = k0 + blockIdx.z*blockDim.z + threadIdx.z;
+    if (i >= Nx || j >= Ny || k >= k1) return;
+
+    const long long Nxy = (long long)Nx*Ny;
+    const long long N = Nxy*Nz;
+    const long long n = i + Nx*j + Nxy*k;
+    const long long x = n, y = N + n, z = 2*N + n;
+
+    const real hx = m[x]*H[x];
+    const real hy = m[y]*H[y];
+    const real hz = m[z]*H[z];
+
+    // backward neighbours
+    real hx_y = 0, hx_z = 0, hy_x = 0, hy_z = 0, hz_x = 0, hz_y = 0;
+    if (n-1 >= 0) {
+        hy_x = m[y-1]*H[y-1];
+        hz_x = m[z-1]*H[z-1];
+    }
+    if (n-Nx >= 0) {
+        hx_y = m[x-Nx]*H[x-Nx];
+        hz_y = m[z-Nx]*H[z-Nx];
+    }
+    if (n-Nxy >= 0) {
+        hx_z = m[x-Nxy]*H[x-Nxy];
+        hy_z = m[y-Nxy]*H[y-Nxy];
+    }
+
+    E[x] += b[x]*((hz - hz_y) - (hy - hy_z)) - c[x]*J[x];
+    E[y] += b[y]*((hx - hx_z) - (hz - hz_x)) - c[y]*J[y];
+    E[z] += b[z]*((hy - hy_x) - (hx - hx_y)) - c[z]*J[z];
+
+    if (conductive) {
+        J[x] = s[x]*E[x];
+        J[y] = s[y]*E[y];
+        J[z] = s[z]*E[z];
+    }
+}
+'''
+
+_modules = {}
+
+def _get_kernel(name, dtype):
+    '''Compile (once per dtype) and return the kernel `name`'''
+    dtype = np.dtype(dtype)
+    if dtype not in _modules:
+        real = {np.dtype(np.float32): 'float', np.dtype(np.float64): 'double'}[dtype]
+        _modules[dtype] = cp.RawModule(code=f'typedef {real} real;\n' + _source)
+    return _modules[dtype].get_function(name)
+
+def _check_dtype(*arrays):
+    '''The kernels are compiled for a single floating point 
+    type, so all the arrays must share it'''
+    dtypes = set(a.dtype for a in arrays)
+    if len(dtypes) > 1:
+        raise TypeError('Fields and kernel coefficients must have the same dtype, '
+                        f'got {sorted(str(d) for d in dtypes)}. Set the fields '
+                        'with the dtype of the solver')
+
+def _launch_grid(Nx, Ny, nk):
+    return ((Nx+BLOCK[0]-1)//BLOCK[0], (Ny+BLOCK[1]-1)//BLOCK[1], (nk+BLOCK[2]-1)//BLOCK[2])
+
+def update_H(H, E, a, m, Nx, Ny, Nz, k0, k1):
+    '''
+    Magnetic field update H = H - dt*tDs*iDmu*iDa*C * E
+
+    Parameters
+    ----------
+    H: cupy.ndarray
+        Flat H field, updated in-place
+    E: cupy.ndarray
+        Flat E field
+    a: cupy.ndarray
+        Row coefficients dt*tL*imu*iA of the H update
+    m: cupy.ndarray
+        Column mask applied to E (PEC boundaries)
+    Nx, Ny, Nz: int
+        Number of cells in x, y and z
+    k0, k1: int
+        Range of z planes [k0, k1) to update
+    '''
+    _check_dtype(H, E, a, m)
+    kernel = _get_kernel('update_H', H.dtype)
+    kernel(_launch_grid(Nx, Ny, k1-k0), BLOCK,
+           (H, E, a, m, np.int32(Nx), np.int32(Ny), np.int32(Nz),
+            np.int32(k0), np.int32(k1)))
+
+def update_E(E, H, J, b, m, c, s, conductive, Nx, Ny, Nz, k0, k1):
+    '''
+    Electric field update E = E + dt*itDa*iDeps*Ds*C^T * H - dt*iDeps * J
+    fused with the conduction current J = Dsigma * E
+
+    Parameters
+    ----------
+    E: cupy.ndarray
+        Flat E field, updated in-place
+    H: cupy.ndarray
+        Flat H field
+    J: cupy.ndarray
+        Flat current density. Overwritten with
+        sigma*E if `conductive` is True
+    b: cupy.ndarray
+        Row coefficients dt*itA*ieps*L of the E update
+    m: cupy.ndarray
+        Column mask applied to H (PMC boundaries)
+    c: cupy.ndarray
+        Coefficients dt*ieps of the current density
+    s: cupy.ndarray
+        Conductivity tensor
+    conductive: bool
+        If True, update the conduction current J = sigma*E
+    Nx, Ny, Nz: int
+        Number of cells in x, y and z
+    k0, k1: int
+        Range of z planes [k0, k1) to update
+    '''
+    _check_dtype(E, H, J, b, m, c, s)
+    kernel = _get_kernel('update_E', E.dtype)
+    kernel(_launch_grid(Nx, Ny, k1-k0), BLOCK,
+           (E, H, J, b, m, c, s, np.bool_(conductive), np.int32(Nx),
+            np.int32(Ny), np.int32(Nz), np.int32(k0), np.int32(k1)))
@@ -21,6 +21,17 @@ class Field:
     linear numbering:
     n = 1 + (i-1) + (j-1)*Nx + (k-1)*Nx*Ny
     len(n) = Nx*Ny*Nz
+
+    The three components are stored one after the other in 
+    the flat `array` (structure of arrays), and each component
+    can be accessed as a (Nx, Ny, Nz) view through `_data`, 
+    without copies: e.g. `Field._data['z'][i, j, k]`
+
+    Axis convention: x is the fastest varying index and z the 
+    slowest (Fortran order). A plane of constant z is therefore 
+    a contiguous block of Nx*Ny values of each component, which 
+    is what the domain decomposition along z needs to exchange 
+    ghost planes without packing (see `zplane`)
     '''
     def __init__(self, Nx, Ny, Nz, dtype=float, 
                  use_ones=False, use_gpu=False):
@@ -45,6 +56,19 @@ class Field:
         else:
             self.array = self.xp.zeros(self.N*3, dtype=self.dtype, order='F')
 
+    @property
+    def array(self):
+        return self._array
+
+    @array.setter
+    def array(self, value):
+        self._array = value
+        # (Nx, Ny, Nz) views of each component
+        self._data = {}
+        for i, d in enumerate(['x', 'y', 'z']):
+            self._data[d] = self.xp.reshape(value[i*self.N:(i+1)*self.N], 
+                                            (self.Nx, self.Ny, self.Nz), order='F')
+
     @property
     def field_x(self):
         return self.array[0:self.N]
@@ -84,13 +108,30 @@ class Field:
     def fromarray(self, array):
         self.array = array
 
-    def to_matrix(self, key):
+    def _component(self, key):
         if key == 0 or key == 'x':
-            return self.xp.reshape(self.array[0:self.N], (self.Nx, self.Ny, self.Nz), order='F')
-        if key == 1 or key == 'y':
-            return self.xp.reshape(self.array[self.N: 2*self.N], (self.Nx, self.Ny, self.Nz), order='F')
-        if key == 2 or key == 'z':
-            return self.xp.reshape(self.array[2*self.N:3*self.N], (self.Nx, self.Ny, self.Nz), order='F')
+            return 'x'
+        elif key == 1 or key == 'y':
+            return 'y'
+        elif key == 2 or key == 'z':
+            return 'z'
+        else:
+            raise IndexError('Component id not valid')
+
+    def zplane(self, k, key):
+        '''
+        Returns a contiguous 1d view of the Nx*Ny values
+        of component `key` in the plane of constant z index `k`.
+        Writing into the view modifies the field in-place
+        '''
+        k = k % self.Nz
+        n0 = ['x', 'y', 'z'].index(self._component(key))*self.N + k*self.Nx*self.Ny
+        plane = self.array[n0:n0+self.Nx*self.Ny]
+        assert plane.flags.c_contiguous, 'z-plane is not contiguous'
+        return plane
+
+    def to_matrix(self, key):
+        return self._data[self._component(key)]
 
     def from_matrix(self, mat, key):
         if key == 0 or key == 'x':
@@ -107,29 +148,11 @@ class Field:
         if type(key) is tuple:
             if len(key) != 4:
                 raise IndexError('Need 3 indexes and component to access the field')
-            if key[3] == 0 or key[3] == 'x':
-                if self.on_gpu:
-                    field = self.xp.reshape(self.array[0:self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]].get()
-                else:
-                    field = self.xp.reshape(self.array[0:self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]]
-            elif key[3] == 1 or key[3] == 'y':
-                if self.on_gpu:
-                    field = self.xp.reshape(self.array[self.N: 2*self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]].get()
-                else:
-                    field = self.xp.reshape(self.array[self.N: 2*self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]]
-            elif key[3] == 2 or key[3] == 'z':
-                if self.on_gpu:
-                    field = self.xp.reshape(self.array[2*self.N:3*self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]].get()
-                else:
-                    field = self.xp.reshape(self.array[2*self.N:3*self.N], (self.Nx, self.Ny, self.Nz), order='F')
-                    return field[key[0], key[1], key[2]]
+            field = self._data[self._component(key[3])]
+            if self.on_gpu:
+                return field[key[0], key[1], key[2]].get()
             else:
-                raise IndexError('Component id not valid')
+                return field[key[0], key[1], key[2]]
 
         elif type(key) is int:
             if key <= self.N:
@@ -158,9 +181,8 @@ class Field:
             if len(key) != 4:
                 raise IndexError('Need 3 indexes and component to access the field')
             else:
-                field = self.to_matrix(key[3])
-                field[key[0], key[1], key[2]] = value
-                self.from_matrix(field, key[3])
+                # write in-place through the component view
+                self._data[self._component(key[3])][key[0], key[1], key[2]] = value
 
         elif type(key) is int:
             if key <= self.N:
@@ -261,11 +283,13 @@ class Field:
         for key, value in self.__dict__.items():
             if key == "xp":
                 obj.xp = self.xp  # Just copy reference, no need for deepcopy
-            elif key == "array" and self.on_gpu:
-                obj.array = self.xp.array(self.array)  # Ensure CuPy array is copied properly
+            elif key in ("_array", "_data"):
+                pass  # views are rebuilt from the copied array
             else:
                 obj.__dict__[key] = copy.deepcopy(value)
 
+        obj.array = self.xp.array(self.array)  # Ensure CuPy array is copied properly
+
         return obj
 
     def compute_ijk(self, n):
@@ -130,6 +130,45 @@ class GridFIT3D:
             if stl_colors is None:
                 self.assign_colors()
 
+    @classmethod
+    def from_arrays(cls, xmin, xmax, ymin, ymax, zmin, zmax,
+                    Nx, Ny, Nz, solids, stl_materials, stl_solids=None,
+                    stl_colors=None, verbose=1):
+        '''
+        Build the grid from pre-computed cell masks instead of
+        importing the stl files. Used to share the geometry
+        voxelized once (e.g. on MPI rank 0) without reading
+        the stl files again
+
+        Parameters
+        ----------
+        solids: dict
+            Boolean cell masks per solid [True == in stl],
+            {'Solid 1': mask_1, 'Solid 2': mask_2, ...}
+            of shape (Nx, Ny, Nz), e.g. a z-slab of
+            np.reshape(grid.grid['Solid 1'], (Nx, Ny, Nz))
+        stl_materials: dict
+            Material properties associated with each solid
+        stl_solids: dict, optional
+            stl file names, kept for plotting only.
+            The files are not read
+        '''
+        obj = cls(xmin, xmax, ymin, ymax, zmin, zmax, Nx, Ny, Nz,
+                  stl_materials=stl_materials, stl_colors=stl_colors,
+                  verbose=verbose)
+
+        if stl_solids is None:
+            stl_solids = dict.fromkeys(solids)
+        obj.stl_solids = stl_solids
+
+        for key in solids.keys():
+            obj.grid[key] = np.reshape(solids[key], (Nx, Ny, Nz)).ravel().astype(bool)
+
+        if stl_colors is None:
+            obj.assign_colors()
+
+        return obj
+
     def mark_cells_in_stl(self):
 
         if self.verbose: print('Importing stl solids...')
@@ -0,0 +1,267 @@
+# copyright ################################# #
+# This file is part of the wakis Package.     #
+# Copyright (c) CERN, 2024.                   #
+# ########################################### #
+
+'''
+The `kernels.py` script contains the Numba-compiled
+stencil kernels used by `SolverFIT3D` to advance the
+fields one timestep without the sparse matrix-vector
+products of the curl operator.
+
+The kernels operate on the flat component arrays of a
+`Field` object (e.g. `E.field_x`), where the linear index
+    n = i + j*Nx + k*Nx*Ny
+so the neighbours in x, y and z are found at offsets
+1, Nx and Nx*Ny. Neighbours falling outside the array
+are taken as zero, reproducing exactly the truncated
+difference matrices Px, Py, Pz of the FIT curl matrix C.
+
+The material, grid and boundary information is passed
+as pre-computed coefficient arrays (see
+`SolverFIT3D.assemble_kernel_coefficients`).
+
+The cells are traversed in (BI, BJ, BK) tiles so the
+neighbouring planes of a tile stay in cache while it is
+updated. The x index i has unit stride and is kept as the
+innermost loop. Tiles are distributed among the threads.
+The tile sizes are compile-time constants: modify them
+before the first call and clear the numba cache.
+
+The kernels update a range of z planes [k0, k1), so the
+planes next to the MPI ghost planes can be updated once
+the halo exchange has completed (see `SolverFIT3D.mpi_one_step`).
+
+The timestep is folded into the coefficient arrays, and the
+arithmetic is carried out in their dtype, so float32 fields
+give float32 (twice as wide) SIMD code.
+
+Alternatively, the `_order` kernels visit the cells
+in a pre-computed sequence of linear indices, e.g. along
+the Morton (Z-order) curve given by `morton_order`. This
+groups the neighbours in all three directions, which
+can beat the tiles on near-cubic domains.
+
+The kernels release the GIL, so python threads (e.g. the
+on-the-fly plotting of `wakesolve`) run while they execute.
+'''
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    imported_numba = True
+except ImportError:
+    imported_numba = False
+
+    # kernels remain importable as plain python
+    prange = range
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# tile sizes in x, y, z. Whole x rows are kept in a
+# tile since x is the unit-stride direction
+BI, BJ, BK = 128, 8, 8
+
+@njit(inline='always', fastmath=True, cache=True, nogil=True)
+def _update_H_cell(n, Nx, Nxy, Hx, Hy, Hz, Ex, Ey, Ez, ax, ay, az, mx, my, mz):
+    '''H update of the cell with linear index n'''
+    N = Hx.shape[0]
+    zero = Hx.dtype.type(0)
+    ex = mx[n]*Ex[n]
+    ey = my[n]*Ey[n]
+    ez = mz[n]*Ez[n]
+
+    # forward neighbours
+    ex_y, ex_z, ey_x, ey_z, ez_x, ez_y = zero, zero, zero, zero, zero, zero
+    if n+1 < N:
+        ey_x = my[n+1]*Ey[n+1]
+        ez_x = mz[n+1]*Ez[n+1]
+    if n+Nx < N:
+        ex_y = mx[n+Nx]*Ex[n+Nx]
+        ez_y = mz[n+Nx]*Ez[n+Nx]
+    if n+Nxy < N:
+        ex_z = mx[n+Nxy]*Ex[n+Nxy]
+        ey_z = my[n+Nxy]*Ey[n+Nxy]
+
+    Hx[n] -= ax[n]*((ez_y - ez) - (ey_z - ey))
+    Hy[n] -= ay[n]*((ex_z - ex) - (ez_x - ez))
+    Hz[n] -= az[n]*((ey_x - ey) - (ex_y - ex))
+
+@njit(inline='always', fastmath=True, cache=True, nogil=True)
+def _update_E_cell(n, Nx, Nxy, Ex, Ey, Ez, Hx, Hy, Hz, Jx, Jy, Jz, bx, by, bz,
+                   mx, my, mz, cx, cy, cz, sx, sy, sz, conductive):
+    '''E and J update of the cell with linear index n'''
+    zero = Ex.dtype.type(0)
+    hx = mx[n]*Hx[n]
+    hy = my[n]*Hy[n]
+    hz = mz[n]*Hz[n]
+
+    # backward neighbours
+    hx_y, hx_z, hy_x, hy_z, hz_x, hz_y = zero, zero, zero, zero, zero, zero
+    if n-1 >= 0:
+        hy_x = my[n-1]*Hy[n-1]
+        hz_x = mz[n-1]*Hz[n-1]
+    if n-Nx >= 0:
+        hx_y = mx[n-Nx]*Hx[n-Nx]
+        hz_y = mz[n-Nx]*Hz[n-Nx]
+    if n-Nxy >= 0:
+        hx_z = mx[n-Nxy]*Hx[n-Nxy]
+        hy_z = my[n-Nxy]*Hy[n-Nxy]
+
+    Ex[n] += bx[n]*((hz - hz_y) - (hy - hy_z)) - cx[n]*Jx[n]
+    Ey[n] += by[n]*((hx - hx_z) - (hz - hz_x)) - cy[n]*Jy[n]
+    Ez[n] += bz[n]*((hy - hy_x) - (hx - hx_y)) - cz[n]*Jz[n]
+
+    if conductive:
+        Jx[n] = sx[n]*Ex[n]
+        Jy[n] = sy[n]*Ey[n]
+        Jz[n] = sz[n]*Ez[n]
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def update_H(Hx, Hy, Hz, Ex, Ey, Ez, ax, ay, az, mx, my, mz, Nx, Ny, k0, k1):
+    '''
+    Magnetic field update H = H - dt*tDs*iDmu*iDa*C * E
+
+    Parameters
+    ----------
+    Hx, Hy, Hz: ndarray
+        Flat H field components, updated in-place
+    Ex, Ey, Ez: ndarray
+        Flat E field components
+    ax, ay, az: ndarray
+        Row coefficients dt*tL*imu*iA of the H update
+    mx, my, mz: ndarray
+        Column mask applied to E (PEC boundaries)
+    Nx, Ny: int
+        Number of cells in x and y
+    k0, k1: int
+        Range of z planes [k0, k1) to update
+    '''
+    Nxy = Nx*Ny
+    nti, ntj, ntk = (Nx+BI-1)//BI, (Ny+BJ-1)//BJ, (k1-k0+BK-1)//BK
+    for t in prange(nti*ntj*ntk):
+        i0, j0, kk = (t % nti)*BI, ((t//nti) % ntj)*BJ, k0+(t//(nti*ntj))*BK
+        for k in range(kk, min(kk+BK, k1)):
+            for j in range(j0, min(j0+BJ, Ny)):
+                for i in range(i0, min(i0+BI, Nx)):
+                    _update_H_cell(i + Nx*(j + Ny*k), Nx, Nxy, Hx, Hy, Hz, 
+                                   Ex, Ey, Ez, ax, ay, az, mx, my, mz)
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def update_E(Ex, Ey, Ez, Hx, Hy, Hz, Jx, Jy, Jz, bx, by, bz,
+             mx, my, mz, cx, cy, cz, sx, sy, sz,
+             conductive, Nx, Ny, k0, k1):
+    '''
+    Electric field update E = E + dt*itDa*iDeps*Ds*C^T * H - dt*iDeps * J
+    fused with the conduction current J = Dsigma * E, so E, H
+    and J are streamed through memory only once
+
+    Parameters
+    ----------
+    Ex, Ey, Ez: ndarray
+        Flat E field components, updated in-place
+    Hx, Hy, Hz: ndarray
+        Flat H field components
+    Jx, Jy, Jz: ndarray
+        Flat current density components. Overwritten
+        with sigma*E if `conductive` is True
+    bx, by, bz: ndarray
+        Row coefficients dt*itA*ieps*L of the E update
+    mx, my, mz: ndarray
+        Column mask applied to H (PMC boundaries)
+    cx, cy, cz: ndarray
+        Coefficients dt*ieps of the current density
+    sx, sy, sz: ndarray
+        Conductivity tensor
+    conductive: bool
+        If True, update the conduction current J = sigma*E
+    Nx, Ny: int
+        Number of cells in x and y
+    k0, k1: int
+        Range of z planes [k0, k1) to update
+    '''
+    Nxy = Nx*Ny
+    nti, ntj, ntk = (Nx+BI-1)//BI, (Ny+BJ-1)//BJ, (k1-k0+BK-1)//BK
+    for t in prange(nti*ntj*ntk):
+        i0, j0, kk = (t % nti)*BI, ((t//nti) % ntj)*BJ, k0+(t//(nti*ntj))*BK
+        for k in range(kk, min(kk+BK, k1)):
+            for j in range(j0, min(j0+BJ, Ny)):
+                for i in range(i0, min(i0+BI, Nx)):
+                    _update_E_cell(i + Nx*(j + Ny*k), Nx, Nxy, Ex, Ey, Ez, 
+                                   Hx, Hy, Hz, Jx, Jy, Jz, bx, by, bz,
+                                   mx, my, mz, cx, cy, cz, sx, sy, sz, conductive)
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def update_H_order(Hx, Hy, Hz, Ex, Ey, Ez, ax, ay, az, mx, my, mz, Nx, Ny, order):
+    '''
+    Same as `update_H`, visiting the cells in the sequence 
+    of linear indices given by `order` (see `morton_order`)
+    instead of in tiles
+    '''
+    Nxy = Nx*Ny
+    for m in prange(order.shape[0]):
+        _update_H_cell(order[m], Nx, Nxy, Hx, Hy, Hz, 
+                       Ex, Ey, Ez, ax, ay, az, mx, my, mz)
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def update_E_order(Ex, Ey, Ez, Hx, Hy, Hz, Jx, Jy, Jz, bx, by, bz,
+                   mx, my, mz, cx, cy, cz, sx, sy, sz,
+                   conductive, Nx, Ny, order):
+    '''
+    Same as `update_E`, visiting the cells in the sequence 
+    of linear indices given by `order` (see `morton_order`)
+    instead of in tiles
+    '''
+    Nxy = Nx*Ny
+    for m in prange(order.shape[0]):
+        _update_E_cell(order[m], Nx, Nxy, Ex, Ey, Ez, 
+                       Hx, Hy, Hz, Jx, Jy, Jz, bx, by, bz,
+                       mx, my, mz, cx, cy, cz, sx, sy, sz, conductive)
+
+def _spread_bits(x):
+    '''Insert two zero bits after every bit of the 
+    (up to 21-bit) integers in x'''
+    x = x.astype(np.uint64) & np.uint64(0x1fffff)
+    for shift, mask in [(32, 0x1f00000000ffff), (16, 0x1f0000ff0000ff),
+                        (8, 0x100f00f00f00f00f), (4, 0x10c30c30c30c30c3),
+                        (2, 0x1249249249249249)]:
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+def morton_encode(i, j, k):
+    '''
+    Morton (Z-order) code of the cell indices i, j, k,
+    obtained by interleaving their bits
+    '''
+    return _spread_bits(i) | (_spread_bits(j) << np.uint64(1)) | (_spread_bits(k) << np.uint64(2))
+
+def morton_order(Nx, Ny, k0, k1):
+    '''
+    Linear indices n = i + j*Nx + k*Nx*Ny of the cells in the 
+    z planes [k0, k1), sorted along the Morton (Z-order) curve.
+    Consecutive cells in this order are close in all three 
+    directions, so a chunk of it keeps the neighbours of the 
+    stencil in cache. The field storage is not modified
+    '''
+    i, j, k = np.meshgrid(np.arange(Nx), np.arange(Ny), np.arange(k1-k0), indexing='ij')
+    code = morton_encode(i.ravel(), j.ravel(), k.ravel())
+    n = i.ravel() + Nx*(j.ravel() + Ny*(k.ravel()+k0))
+    return n[np.argsort(code, kind='stable')].astype(np.int64)
+
+def precompile(dtype=float):
+    '''
+    Trigger the JIT compilation of the kernels on tiny
+    arrays so the compilation time is not paid inside
+    the time loop. Compiled kernels are cached on disk.
+    '''
+    a = np.ones(8, dtype=dtype)
+    update_H(a, a.copy(), a.copy(), a, a, a, a, a, a, a, a, a, 2, 2, 0, 2)
+    update_E(a, a.copy(), a.copy(), a, a, a, a.copy(), a.copy(), a.copy(),
+             a, a, a, a, a, a, a, a, a, a, a, a, True, 2, 2, 0, 2)
+    order = morton_order(2, 2, 0, 2)
+    update_H_order(a, a.copy(), a.copy(), a, a, a, a, a, a, a, a, a, 2, 2, order)
+    update_E_order(a, a.copy(), a.copy(), a, a, a, a.copy(), a.copy(), a.copy(),
+                   a, a, a, a, a, a, a, a, a, a, a, a, True, 2, 2, order)
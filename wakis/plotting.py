@@ -412,7 +412,7 @@ class PlotMixin:
     def plot2D(self, field='E', component='z', plane='ZY', pos=0.5, norm=None, 
                vmin=None, vmax=None, figsize=[8,4], cmap='jet', patch_alpha=0.1, 
                patch_reverse=False, add_patch=False, title=None, off_screen=False, 
-               n=None, interpolation='antialiased'):
+               n=None, interpolation='antialiased', executor=None):
         '''
         Built-in 2D plotting of a field slice using matplotlib
         
@@ -456,10 +456,11 @@ class PlotMixin:
         interpolation: str, default 'antialiased'
             Interpolation method to pass to matplotlib imshow e.g., 'none',
             'antialiased', 'nearest', 'bilinear', 'bicubic', 'spline16', 'spline36',
+        executor: concurrent.futures.ThreadPoolExecutor, optional
+            If provided and off_screen=True, the field slice is copied and
+            the figure is rendered and saved by `render_plot2D` in the executor,
+            so the caller is not blocked by matplotlib. Returns the future.
         '''
-        import matplotlib.pyplot as plt
-        from mpl_toolkits.axes_grid1 import make_axes_locatable
-
         Nx, Ny, Nz = self.Nx, self.Ny, self.Nz
         xmin, xmax = self.grid.xmin, self.grid.xmax 
         ymin, ymax = self.grid.ymin, self.grid.ymax
@@ -514,75 +515,43 @@ class PlotMixin:
         else:
             print("Plane needs to be an array of slices [x,y,z] or a str 'XY', 'ZY', 'ZX'")
 
-        fig, ax = plt.subplots(1,1, figsize=figsize)
-
         if field == 'E':
-            if component == 'Abs':
-                im = ax.imshow(self.E.get_abs()[x, y, z], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)
-            else:
-                im = ax.imshow(self.E[x, y, z, component], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)
-        if field == 'H':
-            if component == 'Abs':
-                im = ax.imshow(self.H.get_abs()[x, y, z], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)
-            else:
-                im = ax.imshow(self.H[x, y, z, component], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)
-        if field == 'J':
-            if component == 'Abs':
-                im = ax.imshow(self.J.get_abs()[x, y, z], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)
-            else:
-                im = ax.imshow(self.J[x, y, z, component], cmap=cmap,  norm=norm, 
-                               extent=extent, origin='lower', vmin=vmin, vmax=vmax,
-                               interpolation=interpolation)  
-                              
-        fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
-        ax.set_title(f'Wakis {field}{component}{cut}')
-        ax.set_xlabel(xax)
-        ax.set_ylabel(yax)
+            F = self.E
+        elif field == 'H':
+            F = self.H
+        elif field == 'J':
+            F = self.J
+
+        # copy the 2d slices so they can be rendered asynchronously
+        if component == 'Abs':
+            data = np.array(F.get_abs()[x, y, z])
+        else:
+            data = np.array(F[x, y, z, component])
 
         # Patch stl
-        if add_patch is not None:
+        patches = []
+        if add_patch is not None and add_patch is not False:
             if type(add_patch) is str:
-                mask = np.reshape(self.grid.grid[add_patch], (Nx, Ny, Nz))
+                add_patch = [add_patch]
+            for solid in add_patch:
+                mask = np.reshape(self.grid.grid[solid], (Nx, Ny, Nz))
                 patch = np.ones((Nx, Ny, Nz))
                 if patch_reverse:
                     patch[mask] = np.nan 
                 else:
                     patch[np.logical_not(mask)] = np.nan 
-                ax.imshow(patch[x,y,z], cmap='Greys', extent=extent, origin='lower', alpha=patch_alpha)
-
-            elif type(add_patch) is list:
-                for solid in add_patch:
-                    mask = np.reshape(self.grid.grid[solid], (Nx, Ny, Nz))
-                    patch = np.ones((Nx, Ny, Nz))
-                    if patch_reverse:
-                        patch[mask] = np.nan 
-                    else:
-                        patch[np.logical_not(mask)] = np.nan 
-                    ax.imshow(patch[x,y,z], cmap='Greys', extent=extent, origin='lower', alpha=patch_alpha)
-
-        if n is not None:
-            fig.suptitle('$'+str(field)+'_{'+str(component)+'}$ field, timestep='+str(n))
-            title += '_'+str(n).zfill(6)
+                patches.append(patch[x,y,z])
 
-        fig.tight_layout()
+        kwargs = dict(data=data, patches=patches, extent=extent, cut=cut, 
+                      xax=xax, yax=yax, field=field, component=component, 
+                      norm=norm, vmin=vmin, vmax=vmax, figsize=figsize, cmap=cmap,
+                      patch_alpha=patch_alpha, title=title, off_screen=off_screen, 
+                      n=n, interpolation=interpolation)
 
-        if off_screen:
-            fig.savefig(title+'.png')
-            plt.clf()
-            plt.close(fig)
-
-        else:
-            plt.show(block=False)
+        if executor is not None and off_screen:
+            return executor.submit(render_plot2D, **kwargs)
+        
+        render_plot2D(**kwargs)
 
     def plot1D(self, field='E', component='z', line='z', pos=[0.5], 
                xscale='linear', yscale='linear', xlim=None, ylim=None, 
@@ -767,4 +736,48 @@ class PlotMixin:
             plt.close(fig)
 
         else:
-            plt.show()
\ No newline at end of file
+            plt.show()
+
+def render_plot2D(data, patches, extent, cut, xax, yax, field, component, 
+                  norm=None, vmin=None, vmax=None, figsize=[8,4], cmap='jet', 
+                  patch_alpha=0.1, title=None, off_screen=False, n=None, 
+                  interpolation='antialiased'):
+    '''
+    Render a 2D field slice prepared by `PlotMixin.plot2D`.
+    Off screen figures are created without pyplot, so they 
+    can be rendered from a background thread
+    '''
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+    if off_screen:
+        fig = Figure(figsize=figsize)
+        ax = fig.subplots(1,1)
+    else:
+        fig, ax = plt.subplots(1,1, figsize=figsize)
+
+    im = ax.imshow(data, cmap=cmap,  norm=norm, 
+                   extent=extent, origin='lower', vmin=vmin, vmax=vmax,
+                   interpolation=interpolation)
+                              
+    fig.colorbar(im, cax=make_axes_locatable(ax).append_axes('right', size='5%', pad=0.05))
+    ax.set_title(f'Wakis {field}{component}{cut}')
+    ax.set_xlabel(xax)
+    ax.set_ylabel(yax)
+
+    # Patch stl
+    for patch in patches:
+        ax.imshow(patch, cmap='Greys', extent=extent, origin='lower', alpha=patch_alpha)
+
+    if n is not None:
+        fig.suptitle('$'+str(field)+'_{'+str(component)+'}$ field, timestep='+str(n))
+        title += '_'+str(n).zfill(6)
+
+    fig.tight_layout()
+
+    if off_screen:
+        fig.savefig(title+'.png')
+
+    else:
+        plt.show(block=False)
@@ -3,9 +3,11 @@
 # Copyright (c) CERN, 2024.                   #
 # ########################################### #
 
+import os
 import numpy as np
 import h5py
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 from scipy.constants import c as c_light
 
 class RoutinesMixin():
@@ -156,6 +158,11 @@ class RoutinesMixin():
         The `Ez` field is saved every timestep in a subdomain (xtest, ytest, z) around 
         the beam trajectory in HDF5 format file `Ez.h5`.
 
+        If the solver runs with `use_mpi`, every rank writes the planes of 
+        its z-slab into the global datasets using parallel HDF5 (collective 
+        I/O). If h5py is not built with MPI support, the slabs are gathered 
+        and written by rank 0. The wake potential is computed on rank 0.
+
         The computed results are available as Solver class attributes: 
             - wake potential: WP (longitudinal), WPx, WPy (transverse) [V/pC]
             - impedance: Z (longitudinal), Zx, Zy (transverse) [Ohm]
@@ -175,7 +182,12 @@ class RoutinesMixin():
         save_J: bool, default False
             Flag to enable saving the current J in a diferent HDF5 file 'Jz.h5'
         plot: bool, default False
-            Flag to enable 2D plotting
+            Flag to enable 2D plotting. Off screen plots are rendered 
+            in a background thread, so the time loop only copies the 
+            2d field slice. Setting the environment variable 
+            WAKIS_PLOT=0 disables the plotting without modifying the script.
+            Not supported with `use_mpi`: every rank only holds its z-slab, 
+            so the plotting is disabled
         plot_every: int
             Number of timesteps between consecutive plots
         **kwargs:
@@ -221,19 +233,31 @@ class RoutinesMixin():
         self.add_space = add_space
 
         # plot params defaults
+        if os.environ.get('WAKIS_PLOT') == '0':
+            plot = False
+        if plot and self.use_mpi:
+            if self.rank == 0:
+                print('*** on-the-fly plotting is not supported with `use_mpi`, running with plot=False')
+            plot = False
         if plot:
             plotkw = {'plane':'ZY', 'pos':0.5, 'title':'Ez',
                     'cmap':'rainbow', 'patch_reverse':True,  
                     'off_screen': True, 'interpolation':'spline36'}
             plotkw.update(kwargs)
 
+        # z coordinates of the full domain
+        if self.use_mpi:
+            z, offset = self.mpi_global_z()
+        else:
+            z, offset = self.z, 0
+
         def beam(self, t):
             '''
             Update the current J every timestep 
             to introduce a gaussian beam 
             moving in +z direction
             '''
-            s0 = self.z.min() - self.v*self.ti
+            s0 = z.min() - self.v*self.ti
             s = self.z - self.v*t
 
             # gaussian
@@ -242,23 +266,53 @@ class RoutinesMixin():
             # update 
             self.J[self.ixs,self.iys,:,'z'] = self.q*self.v*profile/self.dx/self.dy
             
-        tmax = (wakelength + self.ti*self.v + (self.z.max()-self.z.min()))/self.v #[s]
+        tmax = (wakelength + self.ti*self.v + (z.max()-z.min()))/self.v #[s]
         Nt = int(tmax/self.dt)
         xx, yy = slice(self.ixt-1, self.ixt+2), slice(self.iyt-1, self.iyt+2)
         if add_space is not None and add_space !=0:
             zz = slice(add_space, -add_space)
         else: 
-            zz = slice(0, self.Nz)
+            zz = slice(0, len(z))
+
+        # local planes of the subdomain and their position in the datasets
+        if self.use_mpi:
+            k0, k1, _ = zz.indices(len(z))
+            a = max(k0, offset)
+            b = max(min(k1, offset+self.khi-self.klo), a)
+            zloc = slice(a-offset+self.klo, b-offset+self.klo)
+            zglob = slice(a-k0, b-k0)
+            shape = (3, 3, k1-k0)
 
         # hdf5 
-        hf = h5py.File(self.Ez_file, 'w')
-        hf['x'], hf['y'], hf['z'] = self.x[xx], self.y[yy], self.z[zz]
-        hf['t'] = np.arange(0, Nt*self.dt, self.dt)
+        parallel_io = self.use_mpi and h5py.get_config().mpi
+        is_writer = (not self.use_mpi) or parallel_io or self.rank == 0
+
+        def open_h5(filename):
+            if parallel_io:
+                hf = h5py.File(filename, 'w', driver='mpio', comm=self.comm)
+            elif is_writer:
+                hf = h5py.File(filename, 'w')
+            else:
+                return None
+            hf['x'], hf['y'], hf['z'] = self.x[xx], self.y[yy], z[zz]
+            hf['t'] = np.arange(0, Nt*self.dt, self.dt)
+            return hf
+
+        def save(hf, key, field):
+            if not self.use_mpi:
+                hf[key] = field[xx, yy, zz, 'z']
+            elif parallel_io:
+                dset = hf.create_dataset(key, shape, dtype=field.dtype)
+                with dset.collective:
+                    dset[:, :, zglob] = field[xx, yy, zloc, 'z']
+            else:
+                data = self.mpi_gather(field[xx, yy, zloc, 'z'])
+                if self.rank == 0:
+                    hf[key] = data
 
+        hf = open_h5(self.Ez_file)
         if save_J:
-            hfJ = h5py.File('Jz.h5', 'w')
-            hfJ['x'], hfJ['y'], hfJ['z'] = self.x[xx], self.y[yy], self.z[zz]
-            hfJ['t'] = np.arange(0, Nt*self.dt, self.dt)
+            hfJ = open_h5('Jz.h5')
 
         # get update equations
         if use_etd:
@@ -268,17 +322,18 @@ class RoutinesMixin():
 
         if plot_until is None: plot_until = Nt
         if plot_from is None: plot_from = int(self.ti/self.dt)
+        pool, plots = None, []
 
         print('Running electromagnetic time-domain simulation...')
-        for n in tqdm(range(Nt)):
+        for n in tqdm(range(Nt), disable=self.use_mpi and self.rank > 0):
 
             # Initial condition
             beam(self, n*self.dt)
 
             # Save
-            hf['#'+str(n).zfill(5)] = self.E[xx, yy, zz, 'z'] 
+            save(hf, '#'+str(n).zfill(5), self.E)
             if save_J:
-                hfJ['#'+str(n).zfill(5)] = self.J[xx, yy, zz, 'z'] 
+                save(hfJ, '#'+str(n).zfill(5), self.J)
             
             # Advance
             update()
@@ -286,15 +341,29 @@ class RoutinesMixin():
             # Plot
             if plot:
                 if n%plot_every == 0 and n<plot_until and n>plot_from:
-                    self.plot2D(field='E', component='z', n=n, **plotkw)
+                    if pool is None and plotkw['off_screen']:
+                        pool = ThreadPoolExecutor(max_workers=1)
+                    plots.append(self.plot2D(field='E', component='z', n=n, 
+                                             executor=pool, **plotkw))
                 else:
                     pass
 
-        hf.close()
-        if save_J:
-            hfJ.close()
-        
+        # wait for the plots rendered in the background
+        if pool is not None:
+            for future in plots:
+                future.result()
+            pool.shutdown()
+
+        if is_writer:
+            hf.close()
+            if save_J:
+                hfJ.close()
+
         # wake computation 
+        if self.use_mpi:
+            self.comm.Barrier()
+            if self.rank > 0:
+                return
         self.wake.solve()
 
         self.wakelength = wakelength
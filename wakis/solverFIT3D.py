@@ -17,6 +17,8 @@ from .field import Field
 from .materials import material_lib
 from .plotting import PlotMixin
 from .routines import RoutinesMixin
+from . import kernels
+from . import cuda_kernels
 
 try:
     from cupyx.scipy.sparse import csc_matrix as gpu_sparse_mat
@@ -24,13 +26,20 @@ try:
 except ImportError:
     imported_cupyx = False
 
+try:
+    from mpi4py import MPI
+    imported_mpi = True
+except ImportError:
+    imported_mpi = False
+
 class SolverFIT3D(PlotMixin, RoutinesMixin):
 
     def __init__(self, grid, wake=None, cfln=0.5, dt=None,
                  bc_low=['Periodic', 'Periodic', 'Periodic'],
                  bc_high=['Periodic', 'Periodic', 'Periodic'],
                  use_stl=False, use_conductors=False, use_gpu=False,
-                 n_pml=10, bg=[1.0, 1.0], verbose=1):
+                 n_pml=10, bg=[1.0, 1.0], verbose=1, use_numba=True, 
+                 use_mpi=False, dtype=np.float64, use_morton=False, use_cuda=True):
         '''
         Class holding the 3D time-domain electromagnetic solver 
         algorithm based on the Finite Integration Technique (FIT)
@@ -57,7 +66,7 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         use_stl: bool, default False
             If true, activates all the solids and materials passed to the `grid` object
         use_gpu: bool, default False, 
-            Using cupyx, enables GPU accelerated computation of every timestep
+            Using cupy, enables GPU accelerated computation of every timestep
         bg: list, default [1.0, 1.0]
             Background material for the simulation box [eps_r, mu_r, sigma]. Default is vacuum.
             It supports any material from the material library in `materials.py`, of a 
@@ -65,6 +74,30 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
             it enables flag: use_conductivity
         verbose: int or bool, default True
             Enable verbose ouput on the terminal if 1 or True
+        use_numba: bool, default True
+            If numba is installed, advances the fields every timestep with the 
+            compiled stencil kernels in `kernels.py` instead of the sparse 
+            matrix-vector products. Ignored when `use_gpu` is True
+        use_mpi: bool, default False
+            Runs the domain decomposed in z-slabs, one per MPI rank. Each 
+            rank's `grid` must contain its slab plus one ghost plane at every 
+            interface with a neighbouring rank. Ghost planes are exchanged 
+            every timestep with non-blocking communication overlapped with 
+            the stencil kernels. Requires mpi4py and numba, `use_numba=True` 
+            and `use_gpu=False`, otherwise an error is raised
+        dtype: numpy dtype, default np.float64
+            Floating point precision of the fields, material tensors and 
+            operator matrices. np.float32 halves the memory traffic of 
+            every timestep at the cost of precision
+        use_morton: bool, default False
+            If True, the stencil kernels visit the cells along the Morton 
+            (Z-order) curve instead of in tiles, using a look-up table of 
+            linear indices computed once. The field storage is unchanged. 
+            It can improve the cache reuse on near-cubic domains (Nx≈Ny≈Nz)
+        use_cuda: bool, default True
+            If `use_gpu` is True and cupy is installed, advances the fields 
+            every timestep with the CUDA stencil kernels in `cuda_kernels.py`. 
+            If False, the cupyx sparse matrix-vector products are used
 
         Attributes
         ----------
@@ -93,9 +126,23 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         self.use_conductors = use_conductors
         self.use_stl = use_stl
         self.use_gpu = use_gpu
+        self.use_numba = use_numba and kernels.imported_numba and not use_gpu
+        self.use_cuda = use_cuda and cuda_kernels.imported_cupy and use_gpu
+        self.use_mpi = use_mpi
+        if use_mpi:
+            if not imported_mpi:
+                raise ImportError('`use_mpi` requires mpi4py, please check the MPI installation')
+            if not kernels.imported_numba:
+                raise ImportError('`use_mpi` requires numba to compile the stencil kernels')
+            if use_gpu or not use_numba:
+                raise ValueError('`use_mpi` runs on the CPU stencil kernels: '
+                                 'it requires `use_numba=True` and `use_gpu=False`')
+        self.use_morton = use_morton
+        self.morton_lut = {}             # Morton orders of the z plane ranges [k0, k1)
         self.activate_abc = False        # Will turn true if abc BCs are chosen
         self.activate_pml = False        # Will turn true if pml BCs are chosen
         self.use_conductivity = False    # Will turn true if conductive material or pml is added
+        self.dtype = dtype
 
         if use_stl:
             self.use_conductors = False
@@ -125,9 +172,9 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         self.wake = wake
 
         # Fields
-        self.E = Field(self.Nx, self.Ny, self.Nz, use_gpu=self.use_gpu)
-        self.H = Field(self.Nx, self.Ny, self.Nz, use_gpu=self.use_gpu)
-        self.J = Field(self.Nx, self.Ny, self.Nz, use_gpu=self.use_gpu)
+        self.E = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_gpu=self.use_gpu)
+        self.H = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_gpu=self.use_gpu)
+        self.J = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_gpu=self.use_gpu)
 
         # Matrices
         if verbose: print('Assembling operator matrices...')
@@ -137,20 +184,30 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         self.Pz = diags([-1, 1], [0, self.Nx*self.Ny], shape=(N, N), dtype=np.int8)
 
         # original grid
-        self.Ds = diags(self.L.toarray(), shape=(3*N, 3*N), dtype=float)
-        self.iDa = diags(self.iA.toarray(), shape=(3*N, 3*N), dtype=float)
+        self.Ds = diags(self.L.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
+        self.iDa = diags(self.iA.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
 
         # tilde grid
-        self.tDs = diags(self.tL.toarray(), shape=(3*N, 3*N), dtype=float)
-        self.itDa = diags(self.itA.toarray(), shape=(3*N, 3*N), dtype=float)
+        self.tDs = diags(self.tL.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
+        self.itDa = diags(self.itA.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
 
         # Curl matrix
         self.C = vstack([
-                            hstack([sparse_mat((N,N)), -self.Pz, self.Py]),
-                            hstack([self.Pz, sparse_mat((N,N)), -self.Px]),
-                            hstack([-self.Py, self.Px, sparse_mat((N,N))])
+                            hstack([sparse_mat((N,N), dtype=np.int8), -self.Pz, self.Py]),
+                            hstack([self.Pz, sparse_mat((N,N), dtype=np.int8), -self.Px]),
+                            hstack([-self.Py, self.Px, sparse_mat((N,N), dtype=np.int8)])
                         ])
                 
+        # MPI z-slab decomposition
+        if self.use_mpi:
+            self.mpi_initialize()
+            # interfaces between slabs carry no boundary condition
+            bc_low, bc_high = list(bc_low), list(bc_high)
+            if self.rank > 0:
+                bc_low[2] = 'periodic'
+            if self.rank < self.size-1:
+                bc_high[2] = 'periodic'
+
         # Boundaries
         if verbose: print('Applying boundary conditions...')
         self.bc_low = bc_low
@@ -168,9 +225,9 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         else:
             self.eps_bg, self.mu_bg, self.sigma_bg = bg[0]*eps_0, bg[1]*mu_0, 0.0
 
-        self.ieps = Field(self.Nx, self.Ny, self.Nz, use_ones=True)*(1./self.eps_bg) 
-        self.imu = Field(self.Nx, self.Ny, self.Nz, use_ones=True)*(1./self.mu_bg) 
-        self.sigma = Field(self.Nx, self.Ny, self.Nz, use_ones=True)*self.sigma_bg
+        self.ieps = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_ones=True)*(1./self.eps_bg) 
+        self.imu = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_ones=True)*(1./self.mu_bg) 
+        self.sigma = Field(self.Nx, self.Ny, self.Nz, dtype=self.dtype, use_ones=True)*self.sigma_bg
 
         if self.use_stl:
             self.apply_stl()
@@ -203,17 +260,28 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
             if self.dt > self.tau.min():
                 self.dt = self.tau.min()
 
+        if self.use_mpi: # same timestep in all the slabs
+            dt = np.array([self.dt])
+            self.comm.Allreduce(MPI.IN_PLACE, dt, op=MPI.MIN)
+            self.dt = dt[0]
+
         # Pre-computing
         if verbose: print('Pre-computing...') 
-        self.iDeps = diags(self.ieps.toarray(), shape=(3*N, 3*N), dtype=float)
-        self.iDmu = diags(self.imu.toarray(), shape=(3*N, 3*N), dtype=float)
-        self.Dsigma = diags(self.sigma.toarray(), shape=(3*N, 3*N), dtype=float)
+        self.iDeps = diags(self.ieps.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
+        self.iDmu = diags(self.imu.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
+        self.Dsigma = diags(self.sigma.toarray(), shape=(3*N, 3*N), dtype=self.dtype)
 
         self.tDsiDmuiDaC = self.tDs * self.iDmu * self.iDa * self.C 
         self.itDaiDepsDstC = self.itDa * self.iDeps * self.Ds * self.C.transpose()
+
+        if self.use_numba or self.use_mpi or self.use_cuda:
+            self.assemble_kernel_coefficients()
+        if self.use_numba or self.use_mpi:
+            if verbose: print('Compiling stencil kernels...')
+            kernels.precompile(self.dtype)
         
         # Move to GPU
-        if use_gpu:
+        if use_gpu and not self.use_cuda:
             if verbose: print('Moving to GPU...') 
             if imported_cupyx:
                 self.tDsiDmuiDaC = gpu_sparse_mat(self.tDsiDmuiDaC)
@@ -240,21 +308,64 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         if self.verbose: print(f'Re-computing tensor "{tensor}"...') 
 
         if tensor == 'ieps': 
-            self.iDeps = diags(self.ieps.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.iDeps = diags(self.ieps.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
         elif tensor =='imu':
-            self.iDmu = diags(self.imu.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.iDmu = diags(self.imu.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
         elif tensor == 'sigma':
-            self.Dsigma = diags(self.sigma.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.Dsigma = diags(self.sigma.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
         elif tensor == 'all':
-            self.iDeps = diags(self.ieps.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
-            self.iDmu = diags(self.imu.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
-            self.Dsigma = diags(self.sigma.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.iDeps = diags(self.ieps.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
+            self.iDmu = diags(self.imu.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
+            self.Dsigma = diags(self.sigma.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
 
         if self.verbose: print('Re-Pre-computing ...') 
         self.tDsiDmuiDaC = self.tDs * self.iDmu * self.iDa * self.C 
         self.itDaiDepsDstC = self.itDa * self.iDeps * self.Ds * self.C.transpose()
+        if self.use_numba or self.use_mpi or self.use_cuda:
+            self.assemble_kernel_coefficients()
         self.step_0 = False
 
+    def assemble_kernel_coefficients(self):
+        '''Pre-compute the coefficient arrays used by the 
+        stencil kernels in `kernels.py`. They hold the diagonal 
+        of the matrix products dt*tDs*iDmu*iDa, dt*itDa*iDeps*Ds 
+        and dt*iDeps, and the boundary masks applied to the curl 
+        matrix C. The timestep is folded in so it is not applied 
+        every step
+        '''
+        self.kernel_dt = self.dt
+        self.kH = self.dt * self.tL.toarray() * self.imu.toarray() * self.iA.toarray()
+        self.kE = self.dt * self.itA.toarray() * self.ieps.toarray() * self.L.toarray()
+        self.kJ = self.dt * self.ieps.toarray()
+
+        # PEC masks the columns of C, PMC its rows
+        self.maskE = np.ones(3*self.N)
+        self.maskH = np.ones(3*self.N)
+        if hasattr(self, 'BC_pec'):
+            self.maskE = self.BC_pec.toarray().astype(float)
+            self.kE = self.kE * self.maskE
+        if hasattr(self, 'BC_pmc'):
+            self.maskH = self.BC_pmc.toarray().astype(float)
+            self.kH = self.kH * self.maskH
+
+        for key in ['kH', 'kE', 'kJ', 'maskE', 'maskH']:
+            setattr(self, key, getattr(self, key).astype(self.dtype))
+
+        # MPI ghost planes are interior planes of the global domain
+        if self.use_mpi:
+            for mask in [self.maskE, self.maskH]:
+                planes = mask.reshape(3, self.Nz, self.Nx*self.Ny)
+                if self.rank > 0:
+                    planes[:, 0] = planes[:, 1]
+                if self.rank < self.size-1:
+                    planes[:, -1] = planes[:, -2]
+
+        # the CUDA kernels read the coefficients from device memory
+        if self.use_cuda:
+            self.kS = self.sigma.toarray().astype(self.dtype)
+            for key in ['kH', 'kE', 'kJ', 'maskE', 'maskH', 'kS']:
+                setattr(self, key, cuda_kernels.cp.asarray(getattr(self, key)))
+
     def one_step(self):
 
         if self.step_0:
@@ -262,24 +373,211 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
             self.step_0 = False
             self.attrcleanup()
 
-        self.H.fromarray(self.H.toarray() -
-                         self.dt*self.tDsiDmuiDaC*self.E.toarray()
-                         )
-     
-        self.E.fromarray(self.E.toarray() +
-                         self.dt*(self.itDaiDepsDstC * self.H.toarray() 
-                                  - self.iDeps*self.J.toarray()
-                                  )
-                         )
-        
-        #include current computation                 
-        if self.use_conductivity:
-            self.J.fromarray(self.Dsigma*self.E.toarray())
+        if (self.use_numba or self.use_mpi or self.use_cuda) and self.dt != self.kernel_dt:
+            self.rescale_kernel_coefficients()
+
+        if self.use_mpi:
+            self.mpi_one_step()
+        elif self.use_cuda:
+            self.one_step_cuda()
+        elif self.use_numba:
+            # includes the current computation
+            self.one_step_numba()
+        else:
+            # update the field arrays in-place
+            H, E, J = self.H.toarray(), self.E.toarray(), self.J.toarray()
+
+            H -= self.dt*(self.tDsiDmuiDaC*E)
+            E += self.dt*(self.itDaiDepsDstC*H - self.iDeps*J)
+
+            #include current computation: J = Dsigma*E
+            # Dsigma lives on the same device as the fields
+            if self.use_conductivity:
+                J[:] = self.Dsigma*E
      
         #update ABC
         if self.activate_abc:
             self.update_abc()
 
+    def rescale_kernel_coefficients(self):
+        '''Rescale the kernel coefficients if the 
+        timestep `dt` was modified after they were assembled
+        '''
+        ratio = self.dt/self.kernel_dt
+        for k in [self.kH, self.kE, self.kJ]:
+            k *= ratio
+        self.kernel_dt = self.dt
+
+    def one_step_numba(self):
+        '''Advance H and E one timestep in-place using
+        the compiled stencil kernels from `kernels.py`.
+        The curl, the source term and the conduction 
+        current are fused in a single pass over E
+        '''
+        self.update_H_numba(0, self.Nz)
+        self.update_E_numba(0, self.Nz)
+
+    def one_step_cuda(self):
+        '''Advance H and E one timestep in-place on the 
+        GPU using the CUDA stencil kernels from `cuda_kernels.py`
+        '''
+        E, H, J = self.E.toarray(), self.H.toarray(), self.J.toarray()
+
+        cuda_kernels.update_H(H, E, self.kH, self.maskE, 
+                              self.Nx, self.Ny, self.Nz, 0, self.Nz)
+        cuda_kernels.update_E(E, H, J, self.kE, self.maskH, self.kJ, self.kS,
+                              self.use_conductivity, self.Nx, self.Ny, self.Nz, 0, self.Nz)
+
+    def update_H_numba(self, k0, k1):
+        '''Update H in the z planes [k0, k1) with the 
+        compiled stencil kernel
+        '''
+        N = self.N
+        E, H = self.E, self.H
+        kH, mE = self.kH, self.maskE
+
+        args = (H.field_x, H.field_y, H.field_z,
+                E.field_x, E.field_y, E.field_z,
+                kH[:N], kH[N:2*N], kH[2*N:],
+                mE[:N], mE[N:2*N], mE[2*N:],
+                self.Nx, self.Ny)
+
+        if self.use_morton:
+            kernels.update_H_order(*args, self.get_morton_order(k0, k1))
+        else:
+            kernels.update_H(*args, k0, k1)
+
+    def update_E_numba(self, k0, k1):
+        '''Update E (and the conduction current J) in the 
+        z planes [k0, k1) with the compiled stencil kernel
+        '''
+        N = self.N
+        E, H, J = self.E, self.H, self.J
+        kE, kJ, mH = self.kE, self.kJ, self.maskH
+
+        args = (E.field_x, E.field_y, E.field_z,
+                H.field_x, H.field_y, H.field_z,
+                J.field_x, J.field_y, J.field_z,
+                kE[:N], kE[N:2*N], kE[2*N:],
+                mH[:N], mH[N:2*N], mH[2*N:],
+                kJ[:N], kJ[N:2*N], kJ[2*N:],
+                self.sigma.field_x, self.sigma.field_y, self.sigma.field_z,
+                self.use_conductivity, self.Nx, self.Ny)
+
+        if self.use_morton:
+            kernels.update_E_order(*args, self.get_morton_order(k0, k1))
+        else:
+            kernels.update_E(*args, k0, k1)
+
+    def get_morton_order(self, k0, k1):
+        '''Return the linear indices of the cells in the 
+        z planes [k0, k1) sorted along the Morton curve. 
+        The look-up table is computed on the first call
+        '''
+        if (k0, k1) not in self.morton_lut:
+            self.morton_lut[(k0, k1)] = kernels.morton_order(self.Nx, self.Ny, k0, k1)
+        return self.morton_lut[(k0, k1)]
+
+    def mpi_initialize(self):
+        '''Set the MPI communicator and the range of z planes 
+        [klo, khi) owned by this rank. The planes outside 
+        are ghost planes filled by the neighbouring ranks
+        '''
+        self.comm = MPI.COMM_WORLD
+        self.rank = self.comm.Get_rank()
+        self.size = self.comm.Get_size()
+
+        self.klo = 0 if self.rank == 0 else 1
+        self.khi = self.Nz if self.rank == self.size-1 else self.Nz-1
+
+    def mpi_communicate(self, field, direction):
+        '''
+        Start the non-blocking exchange of one ghost plane of 
+        `field` with the neighbouring ranks. The planes are 
+        sent and received in-place through contiguous views 
+        (see `Field.zplane`), so no buffers are allocated
+
+        Parameters:
+        -----------
+        field: Field object
+            Field to communicate, E or H
+        direction: str
+            'down' sends the first owned plane to rank-1 and receives 
+            the upper ghost plane from rank+1. 'up' sends the last owned 
+            plane to rank+1 and receives the lower ghost plane from rank-1
+
+        Returns:
+        --------
+        reqs: list
+            MPI requests to complete with MPI.Request.Waitall
+        '''
+        if direction == 'down':
+            k_send, k_recv = self.klo, self.Nz-1
+            dest, source, tag = self.rank-1, self.rank+1, 0
+        else:
+            k_send, k_recv = self.khi-1, 0
+            dest, source, tag = self.rank+1, self.rank-1, 3
+
+        reqs = []
+        for i, d in enumerate(['x', 'y', 'z']):
+            if 0 <= source < self.size:
+                reqs.append(self.comm.Irecv(field.zplane(k_recv, d), source=source, tag=tag+i))
+            if 0 <= dest < self.size:
+                reqs.append(self.comm.Isend(field.zplane(k_send, d), dest=dest, tag=tag+i))
+
+        return reqs
+
+    def mpi_global_z(self):
+        '''Return the z coordinates of the owned planes of all 
+        the ranks (the global domain) and the global index of 
+        the first plane owned by this rank
+        '''
+        z = np.ascontiguousarray(self.z[self.klo:self.khi])
+        counts = np.empty(self.size, dtype=int)
+        self.comm.Allgather(np.array([len(z)]), counts)
+
+        zs = np.empty(counts.sum(), dtype=z.dtype)
+        self.comm.Allgatherv(z, [zs, counts])
+
+        return zs, counts[:self.rank].sum()
+
+    def mpi_gather(self, data, root=0):
+        '''Gather the slab `data` of every rank along the 
+        last axis (z) into a global array on rank `root`.
+        The data is sent as raw buffers with z as the slowest
+        axis, so the slab of each rank is one contiguous block
+        '''
+        sendbuf = np.ascontiguousarray(np.moveaxis(data, -1, 0))
+        counts = np.empty(self.size, dtype=int)
+        self.comm.Gather(np.array([sendbuf.size]), counts, root=root)
+
+        recvbuf = None
+        if self.rank == root:
+            recvbuf = np.empty(counts.sum(), dtype=sendbuf.dtype)
+        self.comm.Gatherv(sendbuf, [recvbuf, counts], root=root)
+
+        if self.rank == root:
+            recvbuf = recvbuf.reshape((-1,)+sendbuf.shape[1:])
+            return np.moveaxis(recvbuf, 0, -1)
+
+    def mpi_one_step(self):
+        '''
+        Advance the local z-slab one timestep. The update of 
+        H needs the E ghost plane above the slab and the update 
+        of E needs the H ghost plane below it. Each exchange is 
+        started before the update of the planes that do not depend 
+        on it, and completed before the plane next to the ghost
+        '''
+        reqs = self.mpi_communicate(self.E, 'down')
+        self.update_H_numba(self.klo, self.khi-1)
+        MPI.Request.Waitall(reqs)
+        self.update_H_numba(self.khi-1, self.khi)
+
+        reqs = self.mpi_communicate(self.H, 'up')
+        self.update_E_numba(self.klo+1, self.khi)
+        MPI.Request.Waitall(reqs)
+        self.update_E_numba(self.klo, self.klo+1)
+
     def apply_bc_to_C(self):
         '''
         Modifies rows or columns of C and tDs and itDa matrices
@@ -305,8 +603,8 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
                 self.itA[:, :, -1, 'x'] = self.iA[:, :, 0, 'x']
                 self.itA[:, :, -1, 'y'] = self.iA[:, :, 0, 'y']
 
-            self.tDs = diags(self.tL.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
-            self.itDa = diags(self.itA.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.tDs = diags(self.tL.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
+            self.itDa = diags(self.itA.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
 
         # Dirichlet PEC: tangential E field = 0 at boundary
         if any(True for x in self.bc_low if x.lower() in ('electric','pec','pml')) \
@@ -345,6 +643,7 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
 
             # Update C (columns)
             self.C = self.C*self.Dbc
+            self.BC_pec = self.BC
 
 
         # Dirichlet PMC: tangential H field = 0 at boundary
@@ -384,6 +683,7 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
 
             # Update C (rows)
             self.C = self.Dbc*self.C
+            self.BC_pmc = self.BC
 
         # Absorbing boundary conditions ABC
         if any(True for x in self.bc_low if x.lower() == 'abc') \
@@ -403,8 +703,8 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
                 self.itA[:, :, -1, 'x'] = self.iA[:, :, 0, 'x']
                 self.itA[:, :, -1, 'y'] = self.iA[:, :, 0, 'y']
 
-            self.tDs = diags(self.tL.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
-            self.itDa = diags(self.itA.toarray(), shape=(3*self.N, 3*self.N), dtype=float)
+            self.tDs = diags(self.tL.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
+            self.itDa = diags(self.itA.toarray(), shape=(3*self.N, 3*self.N), dtype=self.dtype)
             self.activate_abc = True
 
         # Perfect Matching Layers (PML)
@@ -632,6 +932,10 @@ class SolverFIT3D(PlotMixin, RoutinesMixin):
         if hasattr(self, 'BC'):
             del self.BC
             del self.Dbc
+        if hasattr(self, 'BC_pec'):
+            del self.BC_pec
+        if hasattr(self, 'BC_pmc'):
+            del self.BC_pmc
 
         # Matrices
         del self.Px, self.Py, self.Pz
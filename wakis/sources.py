@@ -49,29 +49,43 @@ class Beam:
         else:  self.ti = 8.548921333333334*self.sigmaz/self.v 
         self.is_first_update = True
 
+    def first_update(self, solver):
+        '''
+        Find the source position in the grid and pre-compute
+        the loop-invariant factors of the gaussian current
+        '''
+        self.ixs, self.iys = np.abs(solver.x-self.xsource).argmin(), np.abs(solver.y-self.ysource).argmin()
+        self.amplitude = self.q*self.v/np.sqrt(2*np.pi*self.sigmaz**2)/solver.dx/solver.dy
+        self.isigma2 = 1/(2*self.sigmaz**2)
+        self.is_first_update = False
+
+    def inject(self, solver, t, zmin, z):
+        # reference shift
+        s = z - self.v*t - (zmin - self.v*self.ti)
+        # update gaussian profile in Jz, in-place
+        solver.J[self.ixs, self.iys, :, 'z'] = self.amplitude*np.exp(-s**2*self.isigma2)
+
     def update(self, solver, t):
         if self.is_first_update:
-            self.ixs, self.iys = np.abs(solver.x-self.xsource).argmin(), np.abs(solver.y-self.ysource).argmin()
-            self.is_first_update = False
-        # reference shift
-        s0 = solver.z.min() - self.v*self.ti
-        s = solver.z - self.v*t
-        # gaussian
-        profile = 1/np.sqrt(2*np.pi*self.sigmaz**2)*np.exp(-(s-s0)**2/(2*self.sigmaz**2))
-        # update 
-        solver.J[self.ixs,self.iys,:,'z'] = self.q*self.v*profile/solver.dx/solver.dy
-
-    def update_mpi(self, solver, t, zmin, z):
+            self.first_update(solver)
+        self.inject(solver, t, solver.z.min(), solver.z)
+
+    def update_mpi(self, solver, t, zmin, z=None):
+        '''
+        Update for a solver running on a z-slab of the domain
+
+        Parameters
+        ---
+        zmin: float
+            Start of the global domain in z [m]
+        z: ndarray, default solver.z
+            Cell centers of the local z-slab [m]
+        '''
         if self.is_first_update:
-            self.ixs, self.iys = np.abs(solver.x-self.xsource).argmin(), np.abs(solver.y-self.ysource).argmin()
-            self.is_first_update = False
-        # reference shift
-        s0 = zmin - self.v*self.ti
-        s = z - self.v*t
-        # gaussian
-        profile = 1/np.sqrt(2*np.pi*self.sigmaz**2)*np.exp(-(s-s0)**2/(2*self.sigmaz**2))
-        # update 
-        solver.J[self.ixs,self.iys,:,'z'] = self.q*self.v*profile/solver.dx/solver.dy
+            self.first_update(solver)
+        if z is None:
+            z = solver.z
+        self.inject(solver, t, zmin, z)
 
 class PlaneWave:
     def __init__(self, xs=None, ys=None, zs=0, nodes=None, f=None, 
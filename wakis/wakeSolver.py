@@ -251,8 +251,6 @@ class WakeSolver():
         self.log('Max simulated time = '+str(round(self.t[-1]*1.0e9,4))+' ns')
         self.log('Wakelength = '+str(round(wakelength,3))+'m')
 
-        # Initialize 
-        WP = np.zeros_like(s)
         keys = list(self.Ez_hf.keys())
 
         # check for rounding errors
@@ -279,14 +277,10 @@ class WakeSolver():
 
         # integral of (Ez(xtest, ytest, z, t=(s+z)/c))dz
         print('Calculating longitudinal wake potential WP(s)...')
-        with tqdm(total=len(s)*len(self.zf)) as pbar:
-            for n in range(len(s)):    
-                for k in range(nz): 
-                    ts = (self.zf[k]+s[n])/self.v-zmin/self.v-self.t[0]+ti
-                    it = int(ts/dt)                 #find index for t
-                    if it < nt:
-                        WP[n] = WP[n]+(Ezt[k, it])*dz   #compute integral
-                    pbar.update(1)
+        ts = (self.zf[np.newaxis, :]+s[:, np.newaxis])/self.v-zmin/self.v-self.t[0]+ti
+        it = (ts/dt).astype(int)           #find index for t, shape (len(s), nz)
+        k = np.arange(nz)
+        WP = np.sum(np.where(it < nt, Ezt[k, np.minimum(it, nt-1)], 0.)*dz, axis=1)
 
         WP = WP/(self.q*1e12)     # [V/pC]
 
@@ -359,7 +353,6 @@ class WakeSolver():
         i0, j0 = self.n_transverse_cells, self.n_transverse_cells    
         WP = np.zeros_like(s)
         WP_3d = np.zeros((i0*2+1,j0*2+1,len(s)))
-        Ezt = np.zeros((nz,nt))
         keys = list(self.Ez_hf.keys())
 
         # check for rounding errors
@@ -367,27 +360,33 @@ class WakeSolver():
             nt = len(keys)-4
             self.log('*** rounding error in number of timesteps')
 
+        # Assembly Ez(x, y, z, t) around the test position:
+        # every timestep is read only once from the h5 file
+        Ez = self.Ez_hf[keys[0]]
+        ic, jc = Ez.shape[0]//2, Ez.shape[1]//2
+        Ezt_3d = np.empty((nt, i0*2+1, j0*2+1, nz))
+        for n in range(nt):
+            Ezt_3d[n] = self.Ez_hf[keys[n]][ic-i0:ic+i0+1, jc-j0:jc+j0+1, :]
+
+        # time index of Ez(z, t=(s+z)/c) for every (s, z), shape (len(s), nz)
+        ts = (self.zf[np.newaxis, :]+s[:, np.newaxis])/self.v-zmin/self.v-self.t[0]+ti
+        it = (ts/dt).astype(int)
+        k = np.arange(nz)
+
         print('Calculating longitudinal wake potential WP(s)')
-        with tqdm(total=len(s)*(i0*2+1)*(j0*2+1)) as pbar:
+        with tqdm(total=(i0*2+1)*(j0*2+1)) as pbar:
             for i in range(-i0,i0+1,1):  
                 for j in range(-j0,j0+1,1):
 
-                    # Assembly Ez field
-                    for n in range(nt):
-                        Ez = self.Ez_hf[keys[n]]
-                        Ezt[:, n] = Ez[Ez.shape[0]//2+i,Ez.shape[1]//2+j,:]
+                    # Ez(z, t) at the transverse position (i, j)
+                    Ezt = Ezt_3d[:, i0+i, j0+j, :].T
 
                     # integral of (Ez(xtest, ytest, z, t=(s+z)/c))dz
-                    for n in range(len(s)):    
-                        for k in range(0, nz): 
-                            ts = (self.zf[k]+s[n])/self.v-zmin/self.v-self.t[0]+ti
-                            it = int(ts/dt)                 #find index for t
-                            WP[n] = WP[n]+(Ezt[k, it])*dz   #compute integral
-                        
-                        pbar.update(1)
+                    WP = WP + np.sum(Ezt[k, it]*dz, axis=1)
 
                     WP = WP/(self.q*1e12)     # [V/pC]
                     WP_3d[i0+i,j0+j,:] = WP 
+                    pbar.update(1)
 
         self.s = s
         self.WP = WP_3d[i0,j0,:]
@@ -445,29 +444,19 @@ class WakeSolver():
         ds = self.s[2]-self.s[1]
         i0, j0 = self.n_transverse_cells, self.n_transverse_cells
 
-        # Initialize variables
-        WPx = np.zeros_like(self.s)
-        WPy = np.zeros_like(self.s)
+        print('Calculating transverse wake potential WPx, WPy...')
+        t0 = time.time()
+
+        # Perform the integral up to (excluding) each s
         int_WP = np.zeros_like(self.WP_3d)
+        np.cumsum(self.WP_3d[:, :, :-1], axis=2, out=int_WP[:, :, 1:])
+        int_WP *= ds
 
-        print('Calculating transverse wake potential WPx, WPy...')
-        # Obtain the transverse wake potential 
-        with tqdm(total=len(self.s)*(i0*2+1)*(j0*2+1)) as pbar:
-            for n in range(len(self.s)):
-                for i in range(-i0,i0+1,1):
-                    for j in range(-j0,j0+1,1):
-                        # Perform the integral
-                        int_WP[i0+i,j0+j,n]=np.sum(self.WP_3d[i0+i,j0+j,0:n])*ds 
-                        pbar.update(1)
-
-                # Perform the gradient (second order scheme)
-                WPx[n] = - (int_WP[i0+1,j0,n]-int_WP[i0-1,j0,n])/(2*dx)
-                WPy[n] = - (int_WP[i0,j0+1,n]-int_WP[i0,j0-1,n])/(2*dy)
-    
-        self.WPx = WPx
-        self.WPy = WPy
+        # Perform the gradient (second order scheme)
+        self.WPx = - (int_WP[i0+1,j0,:]-int_WP[i0-1,j0,:])/(2*dx)
+        self.WPy = - (int_WP[i0,j0+1,:]-int_WP[i0,j0-1,:])/(2*dy)
 
-        self.log(f'Elapsed time {pbar.format_dict["elapsed"]} s')
+        self.log(f'Elapsed time {time.time()-t0} s')
                  
         if self.save:
             np.savetxt(self.folder+'WPx.txt', np.c_[self.s,self.WPx], header='   s [m]'+' '*20+'WP [V/pC]'+'\n'+'-'*48)